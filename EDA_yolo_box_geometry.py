@@ -0,0 +1,147 @@
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+from label_index import build_label_index
+
+def compute_box_geometry(index, image_width=1920, image_height=1080, bins=50, grid_size=32):
+    """
+    Compute per-class histograms of box area, aspect ratio and pixel size, and per-class
+    2D heatmaps of box centers, with one vectorized histogram call per quantity.
+
+    Args:
+        index (pd.DataFrame): Box-level label index (see label_index.build_label_index).
+        image_width (int): Image width in pixels, used for the pixel size and aspect ratio.
+        image_height (int): Image height in pixels, used for the pixel size and aspect ratio.
+        bins (int): Number of (log-spaced) bins for area, aspect ratio and pixel size.
+        grid_size (int): Number of cells per side of the center heatmaps.
+
+    Returns:
+        dict: NumPy arrays - 'classes' (C,), '<quantity>_edges' (bins + 1,), '<quantity>_hist' (C, bins)
+              for area, aspect and pixel_size, and 'center_hist' (C, grid_size, grid_size) indexed [class, y, x].
+    """
+    classes, class_codes = np.unique(index['class_id'].to_numpy(), return_inverse=True)
+    class_edges = np.arange(len(classes) + 1) - 0.5
+
+    width = index['width'].to_numpy(dtype=np.float64)
+    height = index['height'].to_numpy(dtype=np.float64)
+    width_px = width * image_width
+    height_px = height * image_height
+
+    # Guard against degenerate boxes before taking ratios and logs
+    tiny = 1e-12
+    quantities = {
+        'area': width * height,
+        'aspect': width_px / np.maximum(height_px, tiny),
+        'pixel_size': np.sqrt(width_px * height_px),
+    }
+    edges = {
+        'area': np.logspace(-6, 0, bins + 1),
+        'aspect': np.logspace(-2, 2, bins + 1),
+        'pixel_size': np.logspace(0, np.log10(max(image_width, image_height)), bins + 1),
+    }
+
+    geometry = {'classes': classes, 'image_size': np.array([image_width, image_height])}
+    for name, values in quantities.items():
+        # Clip into the edge range so that outliers land in the first/last bin instead of being dropped
+        values = np.clip(values, edges[name][0], edges[name][-1])
+        hist, _, _ = np.histogram2d(class_codes, values, bins=[class_edges, edges[name]])
+        geometry[f'{name}_edges'] = edges[name]
+        geometry[f'{name}_hist'] = hist.astype(np.int64)
+
+    center_edges = np.linspace(0, 1, grid_size + 1)
+    center_hist, _ = np.histogramdd(
+        (class_codes, np.clip(index['y_center'].to_numpy(), 0, 1), np.clip(index['x_center'].to_numpy(), 0, 1)),
+        bins=(class_edges, center_edges, center_edges))
+    geometry['center_edges'] = center_edges
+    geometry['center_hist'] = center_hist.astype(np.int64)
+
+    return geometry
+
+def plot_box_geometry(geometry, output_path):
+    """
+    Plot the box geometry distributions in one multi-panel figure: class x bin heatmaps for
+    area, aspect ratio and pixel size, and the box center heatmap over all classes.
+
+    Args:
+        geometry (dict): Output of compute_box_geometry.
+        output_path (str): Path to save the output plot image.
+
+    Returns:
+        None
+    """
+    classes = geometry['classes']
+    fig, axes = plt.subplots(2, 2, figsize=(20, 16))
+
+    panels = [
+        ('area', 'Box area (fraction of image)'),
+        ('aspect', 'Aspect ratio (width / height, pixels)'),
+        ('pixel_size', 'Box size sqrt(w * h) (pixels)'),
+    ]
+    for ax, (name, xlabel) in zip(axes.flat, panels):
+        hist = geometry[f'{name}_hist']
+        edges = geometry[f'{name}_edges']
+        mesh = ax.pcolormesh(edges, np.arange(len(classes) + 1), np.ma.masked_equal(hist, 0),
+                             norm=LogNorm(), cmap='viridis', shading='flat')
+        ax.set_xscale('log')
+        ax.set_yticks(np.arange(len(classes)) + 0.5)
+        ax.set_yticklabels(classes, fontsize=6)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel('Class ID')
+        ax.set_title(f'{xlabel} per class')
+        fig.colorbar(mesh, ax=ax, label='Box count')
+
+    ax = axes.flat[3]
+    centers = geometry['center_hist'].sum(axis=0)
+    image = ax.imshow(np.ma.masked_equal(centers, 0), extent=(0, 1, 1, 0), norm=LogNorm(), cmap='magma')
+    ax.set_xlabel('x center (normalized)')
+    ax.set_ylabel('y center (normalized)')
+    ax.set_title('Box centers (all classes)')
+    fig.colorbar(image, ax=ax, label='Box count')
+
+    fig.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+    print(f"Plot saved as {output_path}")
+
+def save_box_geometry(geometry, output_path):
+    """
+    Save the box geometry arrays to a compressed .npz file.
+
+    Args:
+        geometry (dict): Output of compute_box_geometry.
+        output_path (str): Path of the .npz file.
+    """
+    np.savez_compressed(output_path, **geometry)
+    print(f"Box geometry arrays saved to {output_path}")
+
+def process_box_geometry(labels_folder, output_image_path, output_arrays_path=None, image_width=1920, image_height=1080, index=None):
+    """
+    Compute, plot and optionally export the per-class box geometry distributions of a label folder.
+
+    Args:
+        labels_folder (str): Path to the folder containing YOLO label files.
+        output_image_path (str): Path to save the output plot image.
+        output_arrays_path (str, optional): Path of the .npz file with the histogram arrays.
+        image_width (int): Image width in pixels.
+        image_height (int): Image height in pixels.
+        index (pd.DataFrame, optional): Prebuilt label index. Built from labels_folder if not given.
+
+    Returns:
+        dict: The histogram arrays (see compute_box_geometry).
+    """
+    if index is None:
+        index = build_label_index(labels_folder)
+    geometry = compute_box_geometry(index, image_width, image_height)
+    plot_box_geometry(geometry, output_image_path)
+    if output_arrays_path:
+        save_box_geometry(geometry, output_arrays_path)
+    print(f"Successfully completed the process. Find the file at {output_image_path}")
+    return geometry
+
+if __name__ == "__main__":
+    # Example usage
+    labels_folder = 'Datasets/47_logos_dataset/10_classes_final/final/split/train/labels'
+    output_image_path = 'Datasets/47_logos_dataset/10_classes_final/final/split/train/box_geometry.png'
+    output_arrays_path = os.path.splitext(output_image_path)[0] + '.npz'
+    process_box_geometry(labels_folder, output_image_path, output_arrays_path)
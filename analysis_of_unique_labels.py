@@ -1,55 +1,30 @@
 import os
-import pandas as pd
-from collections import defaultdict
+from label_index import build_label_index
+from label_cooccurrence import build_incidence_matrix, unique_shared_counts, save_cooccurrence_analysis
 
-def analyze_labels(labels_folder):
+def analyze_labels(labels_folder, output_path=None):
     """
     Analyzes the YOLO format label files in the given folder to identify unique labels and their occurrences 
     in other text files.
 
     Args:
         labels_folder (str): Path to the folder containing the YOLO format label files.
+        output_path (str, optional): Path of a .npz file to save the incidence matrix, the class
+            co-occurrence matrix and the unique/shared counts to.
     
     Returns:
 
-        pd.DataFrame: A DataFrame with two columns: 'unique' and 'others'.
+        pd.DataFrame: A DataFrame with three columns: 'label', 'unique' and 'others'.
     """
-    # Initialize data structures
-    label_to_files = defaultdict(set)
-    file_to_labels = {}
+    # Build the sparse file x class incidence matrix
+    index = build_label_index(labels_folder)
+    incidence, files, classes = build_incidence_matrix(index)
 
-    # Iterate over label files and extract labels
-    for label_file in os.listdir(labels_folder):
-        if label_file.endswith(".txt"):
-            file_path = os.path.join(labels_folder, label_file)
-            with open(file_path, 'r') as file:
-                labels = set()
-                for line in file:
-                    parts = line.strip().split()
-                    if parts:
-                        labels.add(parts[0])
-                file_to_labels[label_file] = labels
-                for label in labels:
-                    label_to_files[label].add(label_file)
+    # Count files where each label is the only label ('unique') or shares the file ('others')
+    df = unique_shared_counts(incidence, classes)
 
-    # Initialize a dictionary to hold unique and other counts
-    unique_labels = defaultdict(lambda: {'unique': 0, 'others': 0})
-
-    # Analyze labels
-    for label, files in label_to_files.items():
-        # Count occurrences of the label in files where it's the only label
-        unique_count = sum(1 for f in files if len(file_to_labels[f]) == 1)
-        
-        # Count occurrences of the label in files where it's not the only label
-        others_count = sum(1 for f in files if len(file_to_labels[f]) > 1)
-
-        # Update unique_labels dictionary
-        unique_labels[label]['unique'] = unique_count
-        unique_labels[label]['others'] = others_count
-
-    # Convert the results to a DataFrame
-    df = pd.DataFrame.from_dict(unique_labels, orient='index').reset_index()
-    df.columns = ['label', 'unique', 'others']
+    if output_path:
+        save_cooccurrence_analysis(output_path, incidence, files, classes)
 
     return df
 
@@ -63,5 +38,9 @@ def main():
     # df.to_csv(output_csv, index=False)
     # print(f"Analysis complete. Results saved to {output_csv}")
 
+    # Save the incidence and co-occurrence matrices (Optional)
+    # output_npz = os.path.join(labels_folder, os.pardir, "label_cooccurrence.npz")  # Update with your path
+    # analyze_labels(labels_folder, output_npz)
+
 if __name__ == "__main__":
     main()
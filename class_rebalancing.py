@@ -0,0 +1,177 @@
+"""
+Index-driven class rebalancing.
+
+Given per-class target instance counts, plan_rebalance selects in one pass over
+the label index which files to drop so that every over-represented class comes
+down to its target without pushing any class below its own target. Single-class
+frames are dropped first and removals are spread across videos round-robin.
+apply_rebalance_plan then deletes the dropped files in place, or hard-links the
+kept files into a new dataset folder.
+"""
+
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from tqdm import tqdm
+from label_index import build_label_index
+
+def plan_rebalance(index, target_counts, seed=0, protect_other_classes=True):
+    """
+    Select the files to drop so that each class reaches its target instance count.
+
+    Args:
+        index (pd.DataFrame): Box-level label index (see label_index.build_label_index).
+        target_counts (dict): Mapping class id -> target number of instances.
+        seed (int): Seed of the random order among equally ranked files.
+        protect_other_classes (bool): If True, classes without a target keep all their
+            instances, so files containing them are never dropped.
+
+    Returns:
+        tuple: (plan DataFrame with 'file', 'video', 'num_classes' and 'num_boxes' of the files
+               to drop, summary DataFrame with 'class_id', 'before', 'target' (-1 if none) and 'after').
+    """
+    files, file_codes = np.unique(index['file'].astype(str).to_numpy(), return_inverse=True)
+    classes, class_codes = np.unique(index['class_id'].to_numpy(), return_inverse=True)
+    videos = index.groupby('file', observed=True)['video'].first().reindex(files).astype(str).to_numpy()
+
+    # Instances per file and class
+    counts = sp.csr_matrix((np.ones(len(file_codes), dtype=np.int64), (file_codes, class_codes)),
+                           shape=(len(files), len(classes)))
+    counts.sum_duplicates()
+
+    before = np.asarray(counts.sum(axis=0)).ravel()
+    targeted = np.isin(classes, list(target_counts))
+    targets = np.array([min(target_counts.get(c, before[i]), before[i]) for i, c in enumerate(classes)], dtype=np.int64)
+    # Lowest count each class may reach; classes without a target are either protected or free
+    floors = np.where(targeted | protect_other_classes, targets, 0)
+    excess = np.where(targeted, before - targets, 0)
+
+    # Candidate files contain at least one class with excess instances
+    has_excess = np.asarray(counts[:, excess > 0].sum(axis=1)).ravel() > 0
+    candidates = np.flatnonzero(has_excess)
+
+    # Rank candidates: single-class files first, then round-robin over videos in random order
+    rng = np.random.default_rng(seed)
+    num_classes = np.diff(counts.indptr)
+    shuffled = rng.permutation(candidates)
+    video_codes = pd.factorize(videos[shuffled])[0]
+    rank_in_video = pd.Series(video_codes).groupby(video_codes).cumcount().to_numpy()
+    order = np.lexsort((rank_in_video, num_classes[shuffled] > 1))
+    candidates = shuffled[order]
+
+    remaining = before.copy()
+    dropped = np.zeros(len(files), dtype=bool)
+    for row in tqdm(candidates, desc="Planning rebalance"):
+        start, end = counts.indptr[row], counts.indptr[row + 1]
+        row_classes = counts.indices[start:end]
+        row_counts = counts.data[start:end]
+        # Drop only if it helps an over-represented class and no class falls below its floor
+        if np.any(targeted[row_classes] & (remaining[row_classes] > targets[row_classes])) and \
+                np.all(remaining[row_classes] - row_counts >= floors[row_classes]):
+            remaining[row_classes] -= row_counts
+            dropped[row] = True
+        if np.all(remaining[targeted] <= targets[targeted]):
+            break
+
+    dropped_rows = np.flatnonzero(dropped)
+    plan = pd.DataFrame({
+        'file': files[dropped_rows],
+        'video': videos[dropped_rows],
+        'num_classes': num_classes[dropped_rows],
+        'num_boxes': np.asarray(counts[dropped_rows].sum(axis=1)).ravel(),
+    })
+    summary = pd.DataFrame({'class_id': classes, 'before': before,
+                            'target': np.where(targeted, targets, -1), 'after': remaining})
+    return plan, summary
+
+def _find_images(images_folder):
+    """
+    Map file stems to image file names in a folder, whatever the image extension.
+    """
+    return {os.path.splitext(f)[0]: f for f in os.listdir(images_folder)}
+
+def apply_rebalance_plan(plan, images_folder, labels_folder, output_folder=None):
+    """
+    Apply a rebalance plan.
+
+    Args:
+        plan (pd.DataFrame): Files to drop, from plan_rebalance.
+        images_folder (str): Path to the folder containing images.
+        labels_folder (str): Path to the folder containing YOLO format label files.
+        output_folder (str, optional): If given, the kept images and labels are hard-linked
+            (copied across file systems) into output_folder/images and output_folder/labels and
+            the source folders are left untouched. Otherwise the dropped files are deleted in place.
+    """
+    images = _find_images(images_folder)
+    drop_stems = {os.path.splitext(f)[0] for f in plan['file']}
+
+    if output_folder is None:
+        for stem in tqdm(drop_stems, desc="Deleting dropped files"):
+            label_path = os.path.join(labels_folder, stem + '.txt')
+            if os.path.exists(label_path):
+                os.remove(label_path)
+            if stem in images:
+                os.remove(os.path.join(images_folder, images[stem]))
+        print(f"Deleted {len(drop_stems)} images and their corresponding label files.")
+        return
+
+    output_images = os.path.join(output_folder, 'images')
+    output_labels = os.path.join(output_folder, 'labels')
+    os.makedirs(output_images, exist_ok=True)
+    os.makedirs(output_labels, exist_ok=True)
+
+    def link(src, dst):
+        if os.path.exists(dst):
+            return
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    kept = 0
+    for label_file in tqdm(os.listdir(labels_folder), desc="Linking kept files"):
+        stem = os.path.splitext(label_file)[0]
+        if stem in drop_stems:
+            continue
+        link(os.path.join(labels_folder, label_file), os.path.join(output_labels, label_file))
+        if stem in images:
+            link(os.path.join(images_folder, images[stem]), os.path.join(output_images, images[stem]))
+        kept += 1
+    print(f"Linked {kept} images and labels to {output_folder}, dropped {len(drop_stems)}.")
+
+def rebalance_dataset(images_folder, labels_folder, target_counts, output_folder=None, plan_output_file=None, seed=0):
+    """
+    Plan and apply a class rebalancing in one pass.
+
+    Args:
+        images_folder (str): Path to the folder containing images.
+        labels_folder (str): Path to the folder containing YOLO format label files.
+        target_counts (dict): Mapping class id -> target number of instances.
+        output_folder (str, optional): Link the kept files here instead of deleting in place.
+        plan_output_file (str, optional): Path of a CSV file to save the plan to.
+        seed (int): Seed of the random order among equally ranked files.
+
+    Returns:
+        pd.DataFrame: Per-class instance counts before and after, with the targets.
+    """
+    index = build_label_index(labels_folder)
+    plan, summary = plan_rebalance(index, target_counts, seed=seed)
+    print(summary.to_string(index=False))
+    if plan_output_file:
+        os.makedirs(os.path.dirname(plan_output_file) or '.', exist_ok=True)
+        plan.to_csv(plan_output_file, index=False)
+        print(f"Rebalance plan saved to {plan_output_file}")
+    apply_rebalance_plan(plan, images_folder, labels_folder, output_folder)
+    return summary
+
+if __name__ == "__main__":
+    # Example usage
+    images_folder = 'Datasets/47_logos_dataset/10_classes_final/images'
+    labels_folder = 'Datasets/47_logos_dataset/10_classes_final/labels'
+    output_folder = 'Datasets/47_logos_dataset/10_classes_final/rebalanced'
+    target_counts = {36: 20000, 29: 20000, 24: 20000}  # Target number of instances per class
+
+    rebalance_dataset(images_folder, labels_folder, target_counts, output_folder,
+                      plan_output_file=os.path.join(output_folder, 'rebalance_plan.csv'))
@@ -20,7 +20,9 @@ Input Arguments:
 - save_image_issues_path (str): Path to save the image issues detected by cleanvision.
 - summary_output_excel_file (str): Path to save the summary statistics report.
 - detailed_output_excel_file (str): Path to save the detailed statistics report.
-- train_output_image_path (str): Path to save the EDA bar chart image.
+- train_output_image_path (str): Path to save the EDA bar chart image. The box geometry plot and arrays are saved next to it.
+- exclude_issues (list): Image issue types (e.g. blurry, exact_duplicates) whose images are dropped before splitting.
+- report_path (str): Path to save the JSON run report (per-step timings, throughput and validation counts).
 
 Expected Outcomes:
 - Images and labels are correctly matched and saved to the destination folders.
@@ -29,6 +31,7 @@ Expected Outcomes:
 - Dataset is split into train, validation, and test sets.
 - YOLO format is validated, and statistics reports are generated.
 - EDA is performed, and class labels are remapped to start from zero.
+- A JSON report and a parquet table of offending files are saved for the run.
 """
 
 # Import necessary functions from your scripts
@@ -39,14 +42,17 @@ from delete_bbox_of_specific_classes import delete_specific_files, filter_label_
 from copy_images_labels import copy_images, copy_labels
 from delete_extra_images import remove_extra_images
 from delete_extra_labels import remove_extra_annotations
-from find_issue_in_images import find_issues_in_images  # Import your custom script for cleanvision
+from find_issue_in_images import find_issues_in_images_incremental  # Import your custom script for cleanvision
+from image_issue_filter import load_exclusions
 from dataset_splitter_in_train_val_test import split_dataset
 from yolo_dataset_validation import run_all_checks
 from dataset_stats import generate_statistics_report
 from EDA_yolo_labels_by_classses_no import process_labels
+from EDA_yolo_box_geometry import process_box_geometry
 from unique_labels_replace import remap_labels_in_yolo_files
+from pipeline_report import PipelineReport, folder_size
 
-def preprocess_data(images_folder, annotations_folder, destination_folder_images, destination_folder_labels, base_directory_train_test_valid, val_percent, test_percent, classes_to_keep, files_to_delete, save_image_issues_path, summary_output_excel_file, detailed_output_excel_file, train_output_image_path):
+def preprocess_data(images_folder, annotations_folder, destination_folder_images, destination_folder_labels, base_directory_train_test_valid, val_percent, test_percent, classes_to_keep, files_to_delete, save_image_issues_path, summary_output_excel_file, detailed_output_excel_file, train_output_image_path, report_path=None, interactive=True, exclude_issues=None):
     """
     Preprocess the data by ensuring images and annotations are matched, and unwanted classes are removed.
 
@@ -57,71 +63,100 @@ def preprocess_data(images_folder, annotations_folder, destination_folder_images
         destination_folder_labels (str): Path to the desired destination folder for labels.
         classes_to_keep (set): A set containing the classes to keep.
         files_to_delete (list): A list of filenames to delete.
-
-    
+        report_path (str, optional): Path of the JSON run report. The offending files are
+            saved next to it as parquet. No report is saved if not given.
+        interactive (bool): If False, validation never prompts for deletions.
+        exclude_issues (list, optional): Image issue types to drop before splitting,
+            e.g. ['blurry', 'exact_duplicates'] (see image_issue_filter.ISSUE_BITS).
+
+    Returns:
+        PipelineReport: Per-step wall time, files/s, bytes read and validation rule counts.
     """
+    report = PipelineReport('preprocess_data')
 
     # Step 1: Ensure the number of images and annotations are the same
-    num_images = len(os.listdir(images_folder))
-    num_annotations = len(os.listdir(annotations_folder))
-    
-    if num_images > num_annotations:
-        copy_images_with_matching_annotations(images_folder, annotations_folder, destination_folder_images)
-        copy_labels(annotations_folder, destination_folder_labels)
-    elif num_annotations > num_images:
-        copy_annotations_with_matching_images(images_folder, annotations_folder, destination_folder_labels)
-        copy_images(images_folder, destination_folder_images)
+    with report.step('1_match_images_annotations') as record:
+        num_images, image_bytes = folder_size(images_folder)
+        num_annotations, annotation_bytes = folder_size(annotations_folder)
+        record['files'] = num_images + num_annotations
+        record['bytes_read'] = image_bytes + annotation_bytes
+
+        if num_images > num_annotations:
+            copy_images_with_matching_annotations(images_folder, annotations_folder, destination_folder_images)
+            copy_labels(annotations_folder, destination_folder_labels)
+        elif num_annotations > num_images:
+            copy_annotations_with_matching_images(images_folder, annotations_folder, destination_folder_labels)
+            copy_images(images_folder, destination_folder_images)
     
     print("******************** Step 1 Completed: Images and Annotations Matched ********************")
 
     # Step 2: Remove unwanted classes/labels
-    delete_specific_files(destination_folder_labels, files_to_delete)
-    filter_label_files(destination_folder_labels, classes_to_keep)
-    remove_empty_files(destination_folder_labels)
+    with report.step('2_remove_unwanted_classes') as record:
+        record['files'], record['bytes_read'] = folder_size(destination_folder_labels)
+        delete_specific_files(destination_folder_labels, files_to_delete)
+        filter_label_files(destination_folder_labels, classes_to_keep)
+        remove_empty_files(destination_folder_labels)
     print("******************** Step 2 Completed: Unwanted Classes Removed ********************")
     
     # Step 2.1: Ensure the final number of images and annotations are equal
-    final_num_images = len(os.listdir(destination_folder_images))
-    final_num_annotations = len(os.listdir(destination_folder_labels))
-    
-    if final_num_images > final_num_annotations:
-        remove_extra_images(destination_folder_images, destination_folder_labels)
-    elif final_num_annotations > final_num_images:
-        remove_extra_annotations(destination_folder_images, destination_folder_labels)
+    with report.step('2.1_final_match') as record:
+        final_num_images = len(os.listdir(destination_folder_images))
+        final_num_annotations = len(os.listdir(destination_folder_labels))
+        record['files'] = final_num_images + final_num_annotations
+
+        if final_num_images > final_num_annotations:
+            remove_extra_images(destination_folder_images, destination_folder_labels)
+        elif final_num_annotations > final_num_images:
+            remove_extra_annotations(destination_folder_images, destination_folder_labels)
 
     print("******************** Step 2.1 Completed: Final Check of Images and Annotations ********************")
 
     # Step 3: Check for issues in images using the script
-    #find_issues_in_images(destination_folder_images, save_image_issues_path)
+    with report.step('3_image_issues') as record:
+        record['files'], record['bytes_read'] = folder_size(destination_folder_images)
+        find_issues_in_images_incremental(destination_folder_images, save_image_issues_path)
+        excluded_files = load_exclusions(os.path.join(save_image_issues_path, 'issues.csv'), exclude_issues or [])
+        record['excluded'] = len(excluded_files)
     print("******************** Step 3 Completed: Image Issues Checked ********************")
 
     # Step 4: Split the dataset into train, test and valid  
     # change the match logic or see this if its correct or not 
-    split_dataset(base_directory_train_test_valid, destination_folder_images, destination_folder_labels, val_percent, test_percent)
+    with report.step('4_split_dataset') as record:
+        record['files'], record['bytes_read'] = folder_size(destination_folder_images)
+        split_dataset(base_directory_train_test_valid, destination_folder_images, destination_folder_labels, val_percent, test_percent, excluded_files)
     print("******************** Step 4 Completed: Dataset Split ********************")
 
     # Step 5: Validation for the YOLO format script
     train_image_dir = os.path.join(base_directory_train_test_valid, 'train/images')
     train_label_dir = os.path.join(base_directory_train_test_valid, 'train/labels')
-    run_all_checks(train_image_dir, train_label_dir, classes_to_keep)
+    run_all_checks(train_image_dir, train_label_dir, classes_to_keep, report=report, step_prefix='5_validate/train', interactive=interactive)
 
     val_image_dir = os.path.join(base_directory_train_test_valid, 'valid/images')
     val_label_dir = os.path.join(base_directory_train_test_valid, 'valid/labels')
-    run_all_checks(val_image_dir, val_label_dir, classes_to_keep)
+    run_all_checks(val_image_dir, val_label_dir, classes_to_keep, report=report, step_prefix='5_validate/valid', interactive=interactive)
 
     test_image_dir = os.path.join(base_directory_train_test_valid, 'test/images')
     test_label_dir = os.path.join(base_directory_train_test_valid, 'test/labels')
-    run_all_checks(test_image_dir, test_label_dir, classes_to_keep)
+    run_all_checks(test_image_dir, test_label_dir, classes_to_keep, report=report, step_prefix='5_validate/test', interactive=interactive)
 
     print("******************** Step 5 Completed: YOLO Format Validated ********************")
 
     # Step 6: Generate statistics report for the dataset
     # see the match logic as in the splitting part 
-    generate_statistics_report(train_label_dir, val_label_dir, summary_output_excel_file, detailed_output_excel_file)
+    with report.step('6_statistics_report') as record:
+        for label_dir in (train_label_dir, val_label_dir, test_label_dir):
+            num_files, num_bytes = folder_size(label_dir)
+            record['files'] += num_files
+            record['bytes_read'] += num_bytes
+        generate_statistics_report(train_label_dir, val_label_dir, summary_output_excel_file, detailed_output_excel_file, test_label_dir=test_label_dir)
     print("******************** Step 6 Completed: Statistics Report Generated ********************")
 
     # Step 7: EDA for seeing the number of classes performed on ONLY the training data
-    process_labels(train_label_dir, train_output_image_path)
+    with report.step('7_eda') as record:
+        record['files'], record['bytes_read'] = folder_size(train_label_dir)
+        process_labels(train_label_dir, train_output_image_path)
+        geometry_output_path = os.path.splitext(train_output_image_path)[0] + '_geometry'
+        process_box_geometry(train_label_dir, geometry_output_path + '.png', geometry_output_path + '.npz')
     print("******************** Step 7 Completed: EDA Completed ********************")
 
     # # Step 8: Map the label files starting from 0 
@@ -130,6 +165,11 @@ def preprocess_data(images_folder, annotations_folder, destination_folder_images
     # remap_labels_in_yolo_files(test_label_dir)
     # print("******************** Step 8 Completed: Labels Remapped ********************")
 
+    if report_path:
+        report.save(report_path)
+
+    return report
+
 if __name__ == '__main__':
     # Define your paths and parameters
     images_folder = 'Datasets/47_logos_dataset/10_classes_final/images'
@@ -145,6 +185,8 @@ if __name__ == '__main__':
     summary_output_excel_file = 'Datasets/47_logos_dataset/10_classes_final/final/summary.xlsx'  # Make sure to include file name with xlsx extension
     detailed_output_excel_file = 'Datasets/47_logos_dataset/10_classes_final/final/detailed.xlsx'  # Make sure to include file name with xlsx extension
     train_output_image_path = 'Datasets/47_logos_dataset/10_classes_final/split/final/bbox_train.png'  # Make sure you specify the file name with png format 
+    report_path = 'Datasets/47_logos_dataset/10_classes_final/final/pipeline_report.json'  # Offending files are saved next to it as parquet
+    exclude_issues = ['blurry', 'exact_duplicates']  # Image issues dropped before splitting
 
     # Run the preprocessing pipeline
-    preprocess_data(images_folder, annotations_folder, destination_folder_images, destination_folder_labels, base_directory_train_test_valid, val_percent, test_percent, classes_to_keep, files_to_delete, save_image_issues_path, summary_output_excel_file, detailed_output_excel_file, train_output_image_path)
+    preprocess_data(images_folder, annotations_folder, destination_folder_images, destination_folder_labels, base_directory_train_test_valid, val_percent, test_percent, classes_to_keep, files_to_delete, save_image_issues_path, summary_output_excel_file, detailed_output_excel_file, train_output_image_path, report_path, exclude_issues=exclude_issues)
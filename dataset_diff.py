@@ -0,0 +1,173 @@
+"""
+Diff two versions of a dataset from their label indexes.
+
+Each version is given as a saved label index (.parquet), a split base directory
+(with train/valid/test label folders) or a single label folder. Files are
+matched with sorted-array joins and compared by an order-independent hash of
+their boxes, which gives:
+- added, removed and modified label files,
+- files that moved between splits,
+- per-class instance deltas.
+
+A file name that appears in more than one split of the same version is reported
+as a conflict; its split is then the comma-separated list of its splits.
+
+Label files without any valid box are not part of a label index and are ignored.
+
+Usage:
+    python dataset_diff.py <old> <new> [--output diff_dir]
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from label_index import build_label_index, build_split_index, load_label_index
+
+SPLITS = ('train', 'valid', 'test')
+
+def load_index(source):
+    """
+    Load a label index from a parquet file, a split base directory or a label folder.
+
+    Args:
+        source (str or pd.DataFrame): Saved index, base directory with <split>/labels folders,
+            label folder, or an index that is returned as is.
+
+    Returns:
+        pd.DataFrame: Label index.
+    """
+    if isinstance(source, pd.DataFrame):
+        return source
+    if source.endswith('.parquet'):
+        return load_label_index(source)
+    split_dirs = {split: os.path.join(source, split, 'labels') for split in SPLITS}
+    if any(os.path.isdir(label_dir) for label_dir in split_dirs.values()):
+        return build_split_index(split_dirs)
+    return build_label_index(source)
+
+def file_signatures(index):
+    """
+    Compute one row per file with an order-independent hash of its boxes and its split.
+
+    Args:
+        index (pd.DataFrame): Label index.
+
+    Returns:
+        tuple: (sorted array of file names, uint64 signatures, array of splits,
+                boolean mask of the file names found in more than one split).
+    """
+    box_hash = pd.util.hash_pandas_object(
+        index[['class_id', 'x_center', 'y_center', 'width', 'height']], index=False).to_numpy()
+    files, codes = np.unique(index['file'].astype(str).to_numpy(), return_inverse=True)
+    # Summing the per-box hashes (mod 2**64) makes the signature independent of line order
+    signatures = np.zeros(len(files), dtype=np.uint64)
+    np.add.at(signatures, codes, box_hash)
+    pairs = pd.DataFrame({'file': codes, 'split': index['split'].astype(object).to_numpy()}).drop_duplicates()
+    conflicts = np.bincount(pairs['file'].to_numpy(), minlength=len(files)) > 1
+    splits = np.full(len(files), None, dtype=object)
+    splits[pairs['file'].to_numpy()] = pairs['split'].to_numpy()
+    if conflicts.any():
+        in_conflict = pairs[conflicts[pairs['file'].to_numpy()]]
+        joined = in_conflict.groupby('file')['split'].agg(lambda names: ','.join(sorted(map(str, names))))
+        splits[joined.index.to_numpy()] = joined.to_numpy()
+    return files, signatures, splits, conflicts
+
+def diff_label_indexes(old_index, new_index):
+    """
+    Compare two label indexes.
+
+    Args:
+        old_index (pd.DataFrame): Label index of the old version.
+        new_index (pd.DataFrame): Label index of the new version.
+
+    Returns:
+        dict: 'summary' (dict of counts), 'files' (DataFrame with 'file', 'change', 'old_split',
+              'new_split') and 'classes' (DataFrame with 'class_id', 'old_count', 'new_count', 'delta').
+              Modified files keep the 'modified' change even if they also moved (counted again
+              in 'modified_and_moved'); 'moved' files are unmodified. File names found in more
+              than one split of a version get an additional 'old_conflict' or 'new_conflict' row.
+    """
+    old_files, old_signatures, old_splits, old_conflicts = file_signatures(old_index)
+    new_files, new_signatures, new_splits, new_conflicts = file_signatures(new_index)
+    for version, files, conflicts in (('old', old_files, old_conflicts), ('new', new_files, new_conflicts)):
+        if conflicts.any():
+            print(f"Warning: {conflicts.sum()} file names appear in more than one split of the {version} version, "
+                  f"e.g. {files[conflicts][0]}")
+
+    # Sorted-array join on the file names
+    common, old_pos, new_pos = np.intersect1d(old_files, new_files, assume_unique=True, return_indices=True)
+    removed_mask = np.ones(len(old_files), dtype=bool)
+    removed_mask[old_pos] = False
+    added_mask = np.ones(len(new_files), dtype=bool)
+    added_mask[new_pos] = False
+
+    modified = old_signatures[old_pos] != new_signatures[new_pos]
+    moved = old_splits[old_pos] != new_splits[new_pos]
+    moved_only = moved & ~modified
+
+    changes = [
+        pd.DataFrame({'file': new_files[added_mask], 'change': 'added',
+                      'old_split': None, 'new_split': new_splits[added_mask]}),
+        pd.DataFrame({'file': old_files[removed_mask], 'change': 'removed',
+                      'old_split': old_splits[removed_mask], 'new_split': None}),
+        pd.DataFrame({'file': common[modified], 'change': 'modified',
+                      'old_split': old_splits[old_pos][modified], 'new_split': new_splits[new_pos][modified]}),
+        pd.DataFrame({'file': common[moved_only], 'change': 'moved',
+                      'old_split': old_splits[old_pos][moved_only], 'new_split': new_splits[new_pos][moved_only]}),
+        pd.DataFrame({'file': old_files[old_conflicts], 'change': 'old_conflict',
+                      'old_split': old_splits[old_conflicts], 'new_split': None}),
+        pd.DataFrame({'file': new_files[new_conflicts], 'change': 'new_conflict',
+                      'old_split': None, 'new_split': new_splits[new_conflicts]}),
+    ]
+    df_files = pd.concat(changes, ignore_index=True)
+
+    old_counts = old_index['class_id'].value_counts()
+    new_counts = new_index['class_id'].value_counts()
+    df_classes = pd.concat([old_counts.rename('old_count'), new_counts.rename('new_count')], axis=1).fillna(0).astype(np.int64)
+    df_classes['delta'] = df_classes['new_count'] - df_classes['old_count']
+    df_classes = df_classes.rename_axis('class_id').sort_index().reset_index()
+
+    summary = {
+        'old_files': int(len(old_files)),
+        'new_files': int(len(new_files)),
+        'added': int(added_mask.sum()),
+        'removed': int(removed_mask.sum()),
+        'modified': int(modified.sum()),
+        'moved': int(moved_only.sum()),
+        'modified_and_moved': int((modified & moved).sum()),
+        'old_conflicts': int(old_conflicts.sum()),
+        'new_conflicts': int(new_conflicts.sum()),
+        'old_boxes': int(len(old_index)),
+        'new_boxes': int(len(new_index)),
+    }
+    return {'summary': summary, 'files': df_files, 'classes': df_classes}
+
+def save_diff(diff, output_dir):
+    """
+    Save a diff as summary.csv, file_changes.parquet and class_deltas.csv.
+
+    Args:
+        diff (dict): Output of diff_label_indexes.
+        output_dir (str): Output directory.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pd.Series(diff['summary']).to_csv(os.path.join(output_dir, 'summary.csv'), header=['value'])
+    diff['files'].to_parquet(os.path.join(output_dir, 'file_changes.parquet'), index=False)
+    diff['classes'].to_csv(os.path.join(output_dir, 'class_deltas.csv'), index=False)
+    print(f"Dataset diff saved to {output_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff two dataset versions from their label indexes.")
+    parser.add_argument('old', help="Old version: label index (.parquet), split base directory or label folder.")
+    parser.add_argument('new', help="New version: label index (.parquet), split base directory or label folder.")
+    parser.add_argument('--output', help="Optional directory to save the diff to.")
+    args = parser.parse_args()
+
+    diff = diff_label_indexes(load_index(args.old), load_index(args.new))
+    for key, value in diff['summary'].items():
+        print(f"{key}: {value}")
+    changed_classes = diff['classes'][diff['classes']['delta'] != 0]
+    print(f"\nPer-class instance deltas:\n{changed_classes.to_string(index=False)}")
+    if args.output:
+        save_diff(diff, args.output)
@@ -36,7 +36,7 @@ def can_add_video_to_set(video, current_counts, target_counts, video_logo_stats)
             return False
     return True
 
-def copy_files(video, src_image_dir, src_label_dir, dest_image_dir, dest_label_dir):
+def copy_files(video, src_image_dir, src_label_dir, dest_image_dir, dest_label_dir, excluded_files=None):
     """
     Moves image and label files for a given video to their respective directories.
 
@@ -46,9 +46,12 @@ def copy_files(video, src_image_dir, src_label_dir, dest_image_dir, dest_label_d
         src_label_dir (str): Source directory for labels.
         dest_image_dir (str): Destination directory for images.
         dest_label_dir (str): Destination directory for labels.
+        excluded_files (set, optional): File names without extension that must not be copied.
     """
     for filename in os.listdir(src_image_dir):
         if get_video_name(filename) == video:
+            if excluded_files and os.path.splitext(filename)[0] in excluded_files:
+                continue
             src_image_path = os.path.join(src_image_dir, filename)
             label_filename = os.path.splitext(filename)[0] + '.txt'
             src_label_path = os.path.join(src_label_dir, label_filename)
@@ -62,7 +65,7 @@ def copy_files(video, src_image_dir, src_label_dir, dest_image_dir, dest_label_d
             shutil.copy(src_image_path, dest_image_path)
             shutil.copy(src_label_path, dest_label_path)
 
-def split_dataset(base_dir, image_dir, label_dir, val_percent=20, test_percent=10):
+def split_dataset(base_dir, image_dir, label_dir, val_percent=20, test_percent=10, excluded_files=None):
     """
     Splits the dataset into training, validation, and test sets.
 
@@ -72,6 +75,8 @@ def split_dataset(base_dir, image_dir, label_dir, val_percent=20, test_percent=1
         label_dir (str): Path to the labels directory.
         val_percent (int): Percentage of data to be used for validation. Default is 20%.
         test_percent (int): Percentage of data to be used for testing. Default is 10%.
+        excluded_files (set, optional): File names without extension (e.g. images with quality issues)
+            that are left out of the split and never copied.
     """
     # Count total images and labels before the split
     total_images = len(os.listdir(image_dir))
@@ -102,6 +107,8 @@ def split_dataset(base_dir, image_dir, label_dir, val_percent=20, test_percent=1
         #print(video_name)
         if not video_name:
             continue
+        if excluded_files and os.path.splitext(label_file)[0] in excluded_files:
+            continue
 
         label_path = os.path.join(label_dir, label_file)
         with open(label_path, 'r') as f:
@@ -141,11 +148,11 @@ def split_dataset(base_dir, image_dir, label_dir, val_percent=20, test_percent=1
     # Move files to training, validation, and test directories based on the selected videos
     for video in tqdm(video_logo_stats, desc="Copying files to respective directories"):
         if video in test_videos:
-            copy_files(video, image_dir, label_dir, test_image_dir, test_label_dir)
+            copy_files(video, image_dir, label_dir, test_image_dir, test_label_dir, excluded_files)
         elif video in validation_videos:
-            copy_files(video, image_dir, label_dir, val_image_dir, val_label_dir)
+            copy_files(video, image_dir, label_dir, val_image_dir, val_label_dir, excluded_files)
         else:
-            copy_files(video, image_dir, label_dir, train_image_dir, train_label_dir)
+            copy_files(video, image_dir, label_dir, train_image_dir, train_label_dir, excluded_files)
 
     # Print the summary of the split
     train_images = len(os.listdir(train_image_dir))
@@ -157,6 +164,8 @@ def split_dataset(base_dir, image_dir, label_dir, val_percent=20, test_percent=1
 
     print(f"Total images before split: {total_images}")
     print(f"Total labels before split: {total_labels}")
+    if excluded_files:
+        print(f"Files excluded from the split: {len(excluded_files)}")
     print(f"Total images in training set: {train_images}")
     print(f"Total labels in training set: {train_labels}")
     print(f"Total images in validation set: {val_images}")
@@ -1,143 +1,141 @@
 import os
-from collections import defaultdict
-import re
 import pandas as pd
+from label_index import build_split_index, VIDEO_NAME_PATTERN, VIDEO_NAME_PATTERN_FIRST_TOKEN
 
-def generate_statistics_report(train_label_dir, val_label_dir, summary_output_file, detailed_output_file):
+def compute_split_statistics(index):
     """
-    Generate statistics report for logos in training and validation datasets and save to Excel files.
+    Compute per-logo and per-video×logo instance counts for any number of splits.
 
-    Parameters:
-    train_label_dir (str): Path to the training label directory.
-    val_label_dir (str): Path to the validation label directory.
-    summary_output_file (str): Path to the summary output Excel file.
-    detailed_output_file (str): Path to the detailed output Excel file.
+    Args:
+        index (pd.DataFrame): Box-level label index with a 'split' column (see label_index.build_split_index).
+
+    Returns:
+        tuple: (summary DataFrame with one row per logo and '<split> Count' / '<split> Percentage'
+               columns, detailed DataFrame with 'Split', 'Logo', 'Video', 'Count' columns).
+    """
+    splits = list(index['split'].cat.categories)
+
+    # Instances per logo and split in one grouped count
+    counts = pd.crosstab(index['class_id'], index['split']).reindex(columns=splits, fill_value=0)
+    total = counts.sum(axis=1)
+    percentages = counts.div(total, axis=0) * 100
+
+    df_summary = pd.concat([
+        counts.add_suffix(' Count'),
+        total.rename('Total Count'),
+        percentages.add_suffix(' Percentage'),
+    ], axis=1)
+    df_summary.columns.name = None
+    df_summary = df_summary.rename_axis('Logo').reset_index()
+
+    # Instances per split, video and logo (only observed combinations)
+    df_detailed = (index.groupby(['split', 'video', 'class_id'], observed=True)
+                   .size()
+                   .rename('Count')
+                   .reset_index()
+                   .rename(columns={'split': 'Split', 'video': 'Video', 'class_id': 'Logo'}))
+    df_detailed = df_detailed[['Split', 'Logo', 'Video', 'Count']]
+
+    return df_summary, df_detailed
+
+def save_summary(df_summary, summary_output_file):
+    """
+    Save the summary table. The format is chosen from the extension (.csv, .parquet or .xlsx).
+    """
+    if summary_output_file.endswith('.xlsx'):
+        df_summary.to_excel(summary_output_file, sheet_name='Summary', index=False)
+    elif summary_output_file.endswith('.parquet'):
+        df_summary.to_parquet(summary_output_file, index=False)
+    else:
+        df_summary.to_csv(summary_output_file, index=False)
+    print(f"Summary statistics saved to {summary_output_file}")
+
+def save_detailed(df_detailed, detailed_output_file, sheet_names=None):
+    """
+    Save the video contribution table. Parquet and CSV keep one long table with a 'Split'
+    column, Excel writes one sheet per split.
+
+    Args:
+        df_detailed (pd.DataFrame): Detailed table from compute_split_statistics.
+        detailed_output_file (str): Output path (.parquet, .csv or .xlsx).
+        sheet_names (dict, optional): Mapping split name -> Excel sheet name.
     """
-    def get_video_name(filename):
-        """
-        Extract the video name from the filename.
-        """
-        #match = re.match(r'(.+)_\d+', filename) #for 47_64_logos file
-        match = re.match(r'(.+?)_.*', filename)  # for 5_logo_dataset
-        return match.group(1) if match else None
-
-    def calculate_stats(label_dir):
-        """
-        Calculate logo statistics for the given label directory.
-        """
-        video_logo_stats = defaultdict(lambda: defaultdict(int))
-        total_logo_counts = defaultdict(int)
-
-        for label_file in os.listdir(label_dir):
-            video_name = get_video_name(label_file)
-            if not video_name:
-                continue
-
-            label_path = os.path.join(label_dir, label_file)
-            with open(label_path, 'r') as f:
-                for line in f:
-                    logo_class = line.split()[0]
-                    video_logo_stats[video_name][logo_class] += 1
-                    total_logo_counts[logo_class] += 1
-
-        return video_logo_stats, total_logo_counts
-
-    def calculate_percentage(counts, totals):
-        """
-        Calculate the percentage of total instances.
-        """
-        return {logo: (count / totals[logo]) * 100 for logo, count in counts.items()}
-
-    def prepare_data_for_main_sheet(total_instances, train_logo_counts, val_logo_counts):
-        """
-        Prepare data for the main sheet.
-        """
-        data = {
-            'Logo': [],
-            'Train Count': [],
-            'Validation Count': [],
-            'Total Count': [],
-            'Train Percentage': [],
-            'Validation Percentage': []
-        }
-
-        for logo in total_instances.keys():
-            data['Logo'].append(logo)
-            data['Train Count'].append(train_logo_counts.get(logo, 0))
-            data['Validation Count'].append(val_logo_counts.get(logo, 0))
-            data['Total Count'].append(total_instances[logo])
-            data['Train Percentage'].append(train_percentages.get(logo, 0))
-            data['Validation Percentage'].append(val_percentages.get(logo, 0))
-
-        return pd.DataFrame(data)
-
-    def prepare_video_contribution(stats):
-        """
-        Prepare video contribution data.
-        """
-        video_data = {
-            'Logo': [],
-            'Video': [],
-            'Count': []
-        }
-        for video, logos in stats.items():
-            for logo, count in logos.items():
-                video_data['Logo'].append(logo)
-                video_data['Video'].append(video)
-                video_data['Count'].append(count)
-        return pd.DataFrame(video_data)
-
-    def save_summary_to_excel(df_main, summary_output_file):
-        """
-        Save summary data to an Excel file.
-        """
-        df_main.to_excel(summary_output_file, sheet_name='Summary', index=False)
-        print(f"Summary statistics saved to {summary_output_file}")
-
-    def save_detailed_to_excel(df_train_videos, df_val_videos, detailed_output_file):
-        """
-        Save detailed video contribution data to an Excel file.
-        """
+    if detailed_output_file.endswith('.xlsx'):
+        sheet_names = sheet_names or {}
         with pd.ExcelWriter(detailed_output_file) as writer:
-            df_train_videos.to_excel(writer, sheet_name='Train Videos', index=False)
-            df_val_videos.to_excel(writer, sheet_name='Validation Videos', index=False)
-        print(f"Detailed statistics saved to {detailed_output_file}")
+            for split, df_split in df_detailed.groupby('Split', observed=True):
+                sheet_name = sheet_names.get(split, f'{split} Videos')
+                df_split.drop(columns='Split').to_excel(writer, sheet_name=sheet_name, index=False)
+    elif detailed_output_file.endswith('.csv'):
+        df_detailed.to_csv(detailed_output_file, index=False)
+    else:
+        df_detailed.to_parquet(detailed_output_file, index=False)
+    print(f"Detailed statistics saved to {detailed_output_file}")
+
+def generate_split_statistics(split_label_dirs, output_dir, excel=False, index=None, video_pattern=VIDEO_NAME_PATTERN):
+    """
+    Generate statistics for any number of splits and save them as CSV (summary) and
+    parquet (detailed). Excel copies are only written when requested.
+
+    Args:
+        split_label_dirs (dict): Mapping split name -> label directory, e.g. {'train': ..., 'valid': ..., 'test': ...}.
+        output_dir (str): Directory for the output files.
+        excel (bool): Also write summary.xlsx and detailed.xlsx.
+        index (pd.DataFrame, optional): Prebuilt label index. Built from split_label_dirs if not given.
+        video_pattern (str): Regex whose first group extracts the video name from the file name.
+
+    Returns:
+        tuple: (summary DataFrame, detailed DataFrame).
+    """
+    if index is None:
+        index = build_split_index(split_label_dirs, video_pattern=video_pattern)
 
-    # Calculate stats for training and validation sets
-    train_stats, train_logo_counts = calculate_stats(train_label_dir)
-    val_stats, val_logo_counts = calculate_stats(val_label_dir)
+    df_summary, df_detailed = compute_split_statistics(index)
 
-    # Calculate total instances for all logos
-    total_instances = defaultdict(int)
-    for logo, count in train_logo_counts.items():
-        total_instances[logo] += count
-    for logo, count in val_logo_counts.items():
-        total_instances[logo] += count
+    os.makedirs(output_dir, exist_ok=True)
+    save_summary(df_summary, os.path.join(output_dir, 'summary.csv'))
+    save_detailed(df_detailed, os.path.join(output_dir, 'detailed.parquet'))
+    if excel:
+        save_summary(df_summary, os.path.join(output_dir, 'summary.xlsx'))
+        save_detailed(df_detailed, os.path.join(output_dir, 'detailed.xlsx'))
 
-    # Calculate percentage of total instances in training and validation
-    train_percentages = calculate_percentage(train_logo_counts, total_instances)
-    val_percentages = calculate_percentage(val_logo_counts, total_instances)
+    print("The statistics report has been generated.")
+    return df_summary, df_detailed
 
-    # Prepare data for the main sheet
-    df_main = prepare_data_for_main_sheet(total_instances, train_logo_counts, val_logo_counts)
+def generate_statistics_report(train_label_dir, val_label_dir, summary_output_file, detailed_output_file, test_label_dir=None, video_pattern=VIDEO_NAME_PATTERN_FIRST_TOKEN):
+    """
+    Generate statistics report for logos in training, validation and (optionally) test datasets.
+    The output format follows the file extensions (.xlsx, .csv or .parquet).
 
-    # Prepare data for the video contribution sheet
-    df_train_videos = prepare_video_contribution(train_stats)
-    df_val_videos = prepare_video_contribution(val_stats)
+    Parameters:
+    train_label_dir (str): Path to the training label directory.
+    val_label_dir (str): Path to the validation label directory.
+    summary_output_file (str): Path to the summary output file.
+    detailed_output_file (str): Path to the detailed output file.
+    test_label_dir (str, optional): Path to the test label directory.
+    video_pattern (str): Regex whose first group extracts the video name from the file name.
+    """
+    split_label_dirs = {'Train': train_label_dir, 'Validation': val_label_dir}
+    if test_label_dir is not None:
+        split_label_dirs['Test'] = test_label_dir
 
-    # Save summary to one Excel file
-    save_summary_to_excel(df_main, summary_output_file)
+    index = build_split_index(split_label_dirs, video_pattern=video_pattern)
+    df_summary, df_detailed = compute_split_statistics(index)
 
-    # Save detailed video contributions to another Excel file
-    save_detailed_to_excel(df_train_videos, df_val_videos, detailed_output_file)
+    save_summary(df_summary, summary_output_file)
+    save_detailed(df_detailed, detailed_output_file)
 
     print("The statistics report has been generated.")
 
 # Example usage
 if __name__ == "__main__":
-    generate_statistics_report(
-        train_label_dir='Atheritia/Datasets/47_logos_dataset/final_47_logos_dataset/train/labels',
-        val_label_dir='Atheritia/Datasets/47_logos_dataset/final_47_logos_dataset/valid/labels',
-        summary_output_file='Atheritia/Datasets/47_logos_dataset/final_47_logos_dataset/logo_summary_stats.xlsx',
-        detailed_output_file='Atheritia/Datasets/47_logos_dataset/final_47_logos_dataset/logo_detailed_stats.xlsx'
+    base_dir = 'Atheritia/Datasets/47_logos_dataset/final_47_logos_dataset'
+    generate_split_statistics(
+        split_label_dirs={
+            'train': os.path.join(base_dir, 'train/labels'),
+            'valid': os.path.join(base_dir, 'valid/labels'),
+            'test': os.path.join(base_dir, 'test/labels'),
+        },
+        output_dir=os.path.join(base_dir, 'stats'),
+        excel=False
     )
@@ -1,5 +1,26 @@
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from PIL import Image
 from cleanvision import Imagelab
 
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Per-image issue types; duplicate detection needs the whole dataset and is handled separately
+PER_IMAGE_ISSUE_TYPES = ['dark', 'light', 'odd_aspect_ratio', 'low_information', 'blurry', 'grayscale', 'odd_size']
+
+# Issue types scored relative to the whole dataset (odd_size compares each image to the size quartiles),
+# which are computed over the whole folder instead of per chunk
+DATASET_ISSUE_TYPES = ['odd_size']
+
+# Same default as CleanVision's odd_size check
+ODD_SIZE_IQR_FACTOR = 3.0
+
+CACHE_FILE = 'issue_cache.parquet'
+
 def find_issues_in_images(data_path, save_path):
     """
     Use CleanVision to find and report issues in images.
@@ -10,15 +31,218 @@ def find_issues_in_images(data_path, save_path):
     """
     # Initialize Imagelab with the specified data path
     imagelab = Imagelab(data_path=data_path)
-    
+
     # Automatically check for a predefined list of issues within your dataset
     imagelab.find_issues()
-    
+
     # Produce a neat report of the issues found in your dataset
     imagelab.report()
-    
+
     # Save the report to the specified save path
     imagelab.save(save_path)
 
+def hash_file(file_path):
+    """
+    Compute the SHA-1 hash of a file's content.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: Hex digest of the content.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def hash_files(file_paths, num_workers=8):
+    """
+    Hash files in parallel (I/O bound, so threads are used).
+
+    Args:
+        file_paths (list): Paths of the files.
+        num_workers (int): Number of threads.
+
+    Returns:
+        list: Hex digests in the same order as file_paths.
+    """
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        return list(tqdm(executor.map(hash_file, file_paths, chunksize=64), total=len(file_paths), desc="Hashing images"))
+
+def _score_chunk(file_paths, issue_types):
+    """
+    Run CleanVision on one chunk of images (executed in a worker process).
+    """
+    imagelab = Imagelab(filepaths=file_paths, verbose=False)
+    imagelab.find_issues(issue_types={issue_type: {} for issue_type in issue_types}, n_jobs=1, verbose=False)
+    return imagelab.issues
+
+def image_size(file_path):
+    """
+    Square root of the image area in pixels, as used by CleanVision's odd_size check (reads the header only).
+    """
+    with Image.open(file_path) as image:
+        width, height = image.size
+    return float(np.sqrt(width * height))
+
+def odd_size_scores(sizes, iqr_factor=ODD_SIZE_IQR_FACTOR):
+    """
+    Score the image sizes of a whole dataset the way CleanVision's odd_size check does.
+
+    Args:
+        sizes (np.ndarray): Square root of the image areas.
+        iqr_factor (float): Sizes more than iqr_factor interquartile ranges outside the quartiles are odd.
+
+    Returns:
+        tuple: (scores, is_issue) arrays.
+    """
+    q1, q3 = np.percentile(sizes, [25, 75])
+    min_threshold, max_threshold = q1 - iqr_factor * (q3 - q1), q3 + iqr_factor * (q3 - q1)
+    mid_threshold = (min_threshold + max_threshold) / 2
+    threshold_gap = max_threshold - min_threshold
+    # All sizes in the same quartile range: only sizes that differ from it are odd
+    norm_value, threshold = (threshold_gap, 0.5) if threshold_gap > 0 else (mid_threshold, 1.0)
+    scores = 1 - np.clip(np.abs(sizes - mid_threshold) / norm_value, 0, 1)
+    return scores, scores < threshold
+
+def _load_cache(save_path, cache_file=CACHE_FILE):
+    """
+    Load the per-image issue cache keyed by content hash. On the first run, the cache is seeded
+    from an existing CleanVision issues.csv in save_path whose images are still on disk. Only the
+    columns of per-image issue types are seeded; dataset-relative ones (odd_size, duplicates) are recomputed.
+    """
+    cache_path = os.path.join(save_path, cache_file)
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path)
+
+    issues_path = os.path.join(save_path, 'issues.csv')
+    # Scores of full-resolution images are only reused for the full-resolution cache
+    if cache_file == CACHE_FILE and os.path.exists(issues_path):
+        previous = pd.read_csv(issues_path, index_col=0)
+        previous = previous[[os.path.isfile(path) for path in previous.index]]
+        if len(previous):
+            print(f"Seeding the issue cache from {issues_path} ({len(previous)} images)")
+            previous.index = pd.Index(hash_files(list(previous.index)), name='content_hash')
+            per_image_columns = [column for issue_type in PER_IMAGE_ISSUE_TYPES if issue_type not in DATASET_ISSUE_TYPES
+                                 for column in (f'{issue_type}_score', f'is_{issue_type}_issue') if column in previous.columns]
+            return previous.loc[~previous.index.duplicated(), per_image_columns]
+
+    return pd.DataFrame(index=pd.Index([], name='content_hash'))
+
+def find_issues_in_images_incremental(data_path, save_path, num_workers=4, chunk_size=2000, issue_types=None, thumbnail_cache=None):
+    """
+    Find image issues with CleanVision in parallel chunks, caching the per-image results by
+    content hash so that reruns only score new images.
+
+    Exact duplicates are found from the content hashes over the whole folder, and odd_size is
+    scored against the size quartiles of the whole folder (from the original images) rather than
+    of each chunk. Near duplicates are not computed here since they need all images at once.
+
+    Args:
+        data_path (str): Path to the folder containing the image files in your dataset.
+        save_path (str): Folder for issues.csv, issue_summary.csv and the issue cache.
+        num_workers (int): Number of worker processes running CleanVision.
+        chunk_size (int): Number of images per CleanVision run.
+        issue_types (list, optional): Per-image issue types to check. Defaults to PER_IMAGE_ISSUE_TYPES.
+        thumbnail_cache (ThumbnailCache, optional): If given, CleanVision scores the cached thumbnails
+            instead of the full-resolution images, and the content hashes come from the thumbnail index.
+            Scores are then cached separately, since blur and size scores depend on the resolution.
+
+    Returns:
+        pd.DataFrame: Issues indexed by image path, with a 'content_hash' column (SHA-1 of the image,
+                      empty if it could not be hashed) and '<issue>_score' and 'is_<issue>_issue' columns.
+    """
+    issue_types = issue_types or PER_IMAGE_ISSUE_TYPES
+    os.makedirs(save_path, exist_ok=True)
+
+    image_paths = sorted(os.path.join(data_path, f) for f in os.listdir(data_path) if f.lower().endswith(IMAGE_EXTENSIONS))
+    if thumbnail_cache is not None:
+        hashes = np.array(thumbnail_cache.build(image_paths, num_workers=num_workers), dtype=object)
+        cache_file = f"{os.path.splitext(CACHE_FILE)[0]}_thumb{thumbnail_cache.max_side}.parquet"
+    else:
+        hashes = np.array(hash_files(image_paths), dtype=object)
+        cache_file = CACHE_FILE
+    cache = _load_cache(save_path, cache_file)
+
+    # Score only images whose content is not cached for all requested issue types
+    chunk_issue_types = [issue_type for issue_type in issue_types if issue_type not in DATASET_ISSUE_TYPES]
+    required_columns = [f'is_{issue_type}_issue' for issue_type in chunk_issue_types]
+    if all(column in cache.columns for column in required_columns):
+        cached = cache.dropna(subset=required_columns).index
+    else:
+        cached = pd.Index([])
+    # Images that could not be decoded into a thumbnail have no hash and are left unscored
+    new_mask = ~pd.Index(hashes).isin(cached) & pd.notna(hashes)
+    # Identical images only need to be scored once
+    _, first = np.unique(hashes[new_mask], return_index=True)
+    new_paths = [image_paths[i] for i in np.flatnonzero(new_mask)[first]]
+    print(f"{len(image_paths)} images, {int((~new_mask).sum())} cached, {len(new_paths)} unique new images to score")
+
+    if new_paths and chunk_issue_types:
+        chunks = [new_paths[i:i + chunk_size] for i in range(0, len(new_paths), chunk_size)]
+        path_to_hash = dict(zip(image_paths, hashes))
+        if thumbnail_cache is not None:
+            chunks = [[thumbnail_cache.thumbnail_path(path_to_hash[path]) for path in chunk] for chunk in chunks]
+            path_to_hash = {thumbnail_cache.thumbnail_path(h): h for h in hashes[new_mask]}
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            results = list(tqdm(executor.map(_score_chunk, chunks, [chunk_issue_types] * len(chunks)),
+                                total=len(chunks), desc="Scoring image chunks"))
+        scored = pd.concat(results)
+        scored.index = pd.Index([path_to_hash[path] for path in scored.index], name='content_hash')
+        cache = pd.concat([cache[~cache.index.isin(scored.index)], scored])
+        cache.to_parquet(os.path.join(save_path, cache_file))
+
+    if 'odd_size' in issue_types:
+        # Original image sizes are cached too, so that odd_size can be scored over the whole folder
+        if 'size' not in cache.columns:
+            cache['size'] = np.nan
+        hash_to_path = {h: path for path, h in zip(image_paths, hashes) if pd.notna(h)}
+        known_sizes = cache['size'].reindex(list(hash_to_path))
+        missing = known_sizes.index[known_sizes.isna()].tolist()
+        if missing:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                sizes = list(tqdm(executor.map(image_size, [hash_to_path[h] for h in missing]), total=len(missing), desc="Reading image sizes"))
+            cache = cache.reindex(cache.index.union(pd.Index(missing)))
+            cache.loc[missing, 'size'] = sizes
+            cache.index.name = 'content_hash'
+            cache.to_parquet(os.path.join(save_path, cache_file))
+
+    issues = cache.reindex(hashes)
+    issues.index = pd.Index(image_paths)
+    # Kept in issues.csv so that exact duplicates can be grouped without hashing the images again
+    issues.insert(0, 'content_hash', hashes)
+
+    if 'odd_size' in issue_types:
+        has_size = issues['size'].notna().to_numpy()
+        issues['odd_size_score'] = np.nan
+        issues['is_odd_size_issue'] = False
+        if has_size.any():
+            scores, is_issue = odd_size_scores(issues['size'].to_numpy()[has_size])
+            issues.loc[has_size, 'odd_size_score'] = scores
+            issues.loc[has_size, 'is_odd_size_issue'] = is_issue
+    issues = issues.drop(columns=['size'], errors='ignore')
+
+    # Exact duplicates: every image whose content hash appears more than once
+    hash_counts = pd.Series(hashes).map(pd.Series(hashes).value_counts()).to_numpy()
+    issues['exact_duplicates_score'] = np.where(hash_counts > 1, 0.0, 1.0)
+    issues['is_exact_duplicates_issue'] = hash_counts > 1
+
+    issue_columns = [column for column in issues.columns if column.startswith('is_') and column.endswith('_issue')]
+    summary = pd.DataFrame({
+        'issue_type': [column[3:-6] for column in issue_columns],
+        'num_images': [int(issues[column].fillna(False).astype(bool).sum()) for column in issue_columns],
+    }).sort_values('num_images', ascending=False, ignore_index=True)
+
+    issues.to_csv(os.path.join(save_path, 'issues.csv'))
+    summary.to_csv(os.path.join(save_path, 'issue_summary.csv'))
+    print(summary.to_string(index=False))
+    print(f"Image issues saved to {save_path}")
+    return issues
+
 # Example usage:
 # find_issues_in_images(data_path="/path/to/images", save_path="/path/to/save/results")
+# find_issues_in_images_incremental(data_path="/path/to/images", save_path="/path/to/save/results", num_workers=8)
+# find_issues_in_images_incremental(data_path="/path/to/images", save_path="/path/to/save/results",
+#                                   thumbnail_cache=ThumbnailCache("/path/to/thumbnail_cache"))
@@ -0,0 +1,276 @@
+"""
+Exact and perceptual near-duplicate index for video frames.
+
+For every image the index stores the SHA-1 of the file content (exact
+duplicates) and a 64-bit perceptual hash (DCT pHash of a downscaled grayscale
+frame), computed in parallel and saved as NumPy arrays in one .npz file.
+
+Near duplicates are queried by Hamming distance with multi-index hashing: the
+64 bits are split into max_distance + 1 blocks, so any pair within the distance
+shares at least one block exactly (pigeonhole). Only pairs sharing a block, and
+by default the same video, are compared. Duplicate clusters are the connected
+components of the resulting pair graph.
+"""
+
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from tqdm import tqdm
+from label_index import VIDEO_NAME_PATTERN
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+HASH_SIZE = 8
+DCT_SIZE = 32
+
+def perceptual_hash(gray):
+    """
+    Compute the 64-bit DCT perceptual hash of a grayscale image.
+
+    Args:
+        gray (np.ndarray): Grayscale image.
+
+    Returns:
+        int: 64-bit hash (bit set where the low-frequency DCT coefficient is above the median).
+    """
+    small = cv2.resize(gray, (DCT_SIZE, DCT_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+def _hash_image(image_path):
+    """
+    Compute the content SHA-1 and the perceptual hash of one image.
+    """
+    with open(image_path, 'rb') as file:
+        content = file.read()
+    sha1 = hashlib.sha1(content).digest()
+    # Let the JPEG decoder downscale by 8 while decoding; much cheaper than a full-size decode
+    gray = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return sha1, 0, False
+    return sha1, perceptual_hash(gray), True
+
+def _hash_chunk(image_paths):
+    """
+    Hash a chunk of images (executed in a worker process).
+    """
+    return [_hash_image(path) for path in image_paths]
+
+def _phash_thumbnail_chunk(thumb_paths):
+    """
+    Compute the perceptual hashes of a chunk of cached thumbnails (executed in a worker process).
+    """
+    results = []
+    for path in thumb_paths:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE) if path else None
+        results.append((perceptual_hash(gray), True) if gray is not None else (0, False))
+    return results
+
+def compute_frame_hashes(image_paths, num_workers=8, chunk_size=1000):
+    """
+    Compute the content and perceptual hashes of images in parallel.
+
+    Args:
+        image_paths (list): Paths of the images.
+        num_workers (int): Number of worker processes.
+        chunk_size (int): Number of images per task.
+
+    Returns:
+        tuple: (sha1 array of dtype 'S20', uint64 phash array, bool array of decodable images).
+    """
+    chunks = [image_paths[i:i + chunk_size] for i in range(0, len(image_paths), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        for chunk_result in tqdm(executor.map(_hash_chunk, chunks), total=len(chunks), desc="Hashing frames"):
+            results.extend(chunk_result)
+
+    sha1 = np.array([r[0] for r in results], dtype='S20')
+    phash = np.array([r[1] for r in results], dtype=np.uint64)
+    valid = np.array([r[2] for r in results], dtype=bool)
+    return sha1, phash, valid
+
+def compute_frame_hashes_from_thumbnails(image_paths, thumbnail_cache, num_workers=8, chunk_size=1000):
+    """
+    Compute the content and perceptual hashes of images from a thumbnail cache. The content
+    hashes come from the cache index and only missing thumbnails are decoded at full size.
+
+    Args:
+        image_paths (list): Paths of the images.
+        thumbnail_cache (ThumbnailCache): Thumbnail cache (see thumbnail_cache.py).
+        num_workers (int): Number of worker processes.
+        chunk_size (int): Number of thumbnails per task.
+
+    Returns:
+        tuple: (sha1 array of dtype 'S20', uint64 phash array, bool array of decodable images).
+    """
+    content_hashes = thumbnail_cache.build(image_paths, num_workers=num_workers)
+    thumb_paths = [thumbnail_cache.thumbnail_path(h) if h else None for h in content_hashes]
+    chunks = [thumb_paths[i:i + chunk_size] for i in range(0, len(thumb_paths), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        for chunk_result in tqdm(executor.map(_phash_thumbnail_chunk, chunks), total=len(chunks), desc="Hashing thumbnails"):
+            results.extend(chunk_result)
+
+    sha1 = np.array([bytes.fromhex(h) if h else b'' for h in content_hashes], dtype='S20')
+    phash = np.array([r[0] for r in results], dtype=np.uint64)
+    valid = np.array([r[1] for r in results], dtype=bool)
+    return sha1, phash, valid
+
+def build_duplicate_index(images_folder, index_path=None, num_workers=8, video_pattern=VIDEO_NAME_PATTERN, thumbnail_cache=None):
+    """
+    Hash every image of a folder and optionally save the index as a .npz file.
+
+    Args:
+        images_folder (str): Path to the folder containing the frames.
+        index_path (str, optional): Path of the .npz file.
+        num_workers (int): Number of worker processes.
+        video_pattern (str): Regex whose first group extracts the video name from the file name.
+        thumbnail_cache (ThumbnailCache, optional): If given, perceptual hashes are computed from the cached thumbnails.
+
+    Returns:
+        dict: 'files', 'videos', 'sha1', 'phash' and 'valid' arrays.
+    """
+    files = sorted(f for f in os.listdir(images_folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+    image_paths = [os.path.join(images_folder, f) for f in files]
+    if thumbnail_cache is not None:
+        sha1, phash, valid = compute_frame_hashes_from_thumbnails(image_paths, thumbnail_cache, num_workers)
+    else:
+        sha1, phash, valid = compute_frame_hashes(image_paths, num_workers)
+    stems = pd.Series([os.path.splitext(f)[0] for f in files], dtype=object)
+    videos = stems.str.extract('^' + video_pattern, expand=False).fillna('').to_numpy(dtype=str)
+
+    index = {'files': np.array(files, dtype=str), 'videos': videos, 'sha1': sha1, 'phash': phash, 'valid': valid}
+    if index_path:
+        np.savez(index_path, **index)
+        print(f"Duplicate index saved to {index_path}")
+    return index
+
+def load_duplicate_index(index_path):
+    """
+    Load an index saved with build_duplicate_index.
+
+    Args:
+        index_path (str): Path of the .npz file.
+
+    Returns:
+        dict: 'files', 'videos', 'sha1', 'phash' and 'valid' arrays.
+    """
+    with np.load(index_path) as data:
+        return {key: data[key] for key in data.files}
+
+def hamming_distance(a, b):
+    """
+    Element-wise Hamming distance between two uint64 arrays.
+    """
+    xor = np.bitwise_xor(a, b)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(xor)
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+def _pairs_within_groups(*keys):
+    """
+    Return all (i, j) index pairs of items that are equal on every key array.
+    """
+    num_items = len(keys[0])
+    order = np.lexsort(keys[::-1])
+    changed = np.zeros(max(num_items - 1, 0), dtype=bool)
+    for key in keys:
+        changed |= np.diff(key[order]) != 0
+    boundaries = np.flatnonzero(changed) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [num_items]))
+
+    left, right = [], []
+    multiple = ends - starts > 1
+    for start, end in zip(starts[multiple], ends[multiple]):
+        i, j = np.triu_indices(end - start, k=1)
+        left.append(order[start + i])
+        right.append(order[start + j])
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(left), np.concatenate(right)
+
+def find_duplicate_clusters(index, max_distance=4, same_video=True):
+    """
+    Group exact and near-duplicate frames into clusters.
+
+    Args:
+        index (dict): Output of build_duplicate_index or load_duplicate_index.
+        max_distance (int): Maximum Hamming distance between perceptual hashes of near duplicates.
+        same_video (bool): Only compare frames of the same video.
+
+    Returns:
+        pd.DataFrame: Frames in clusters of two or more, with 'file', 'video', 'cluster' and
+                      'cluster_size', ordered by cluster and file name. The first frame of each
+                      cluster can be kept as its representative.
+    """
+    files = index['files']
+    num_files = len(files)
+    video_codes = pd.factorize(index['videos'])[0] if same_video else np.zeros(num_files, dtype=np.int64)
+
+    # Exact duplicates share the SHA-1; each frame is linked to the first frame with the same content.
+    # Frames without a SHA-1 (images the thumbnail cache could not decode) are left out.
+    with_sha1 = np.flatnonzero(index['sha1'] != b'')
+    _, sha1_codes = np.unique(index['sha1'][with_sha1], return_inverse=True)
+    exact_codes = pd.DataFrame({'video': video_codes[with_sha1], 'sha1': sha1_codes}).groupby(['video', 'sha1'], sort=False).ngroup().to_numpy()
+    _, exact_first = np.unique(exact_codes, return_index=True)
+    exact_left, exact_right = with_sha1, with_sha1[exact_first[exact_codes]]
+
+    # Collapse identical perceptual hashes first so that static scenes do not create quadratic pair counts
+    valid = np.flatnonzero(index['valid'])
+    keys = pd.DataFrame({'video': video_codes[valid], 'phash': index['phash'][valid]})
+    group_codes = keys.groupby(['video', 'phash'], sort=False).ngroup().to_numpy()
+    _, first = np.unique(group_codes, return_index=True)
+    representative = valid[first]
+    same_left, same_right = valid, representative[group_codes]
+    unique_video = keys['video'].to_numpy()[first]
+    unique_phash = keys['phash'].to_numpy(np.uint64)[first]
+
+    # Multi-index hashing: near duplicates within max_distance share at least one of max_distance + 1 blocks
+    num_blocks = max_distance + 1
+    block_bits = -(-64 // num_blocks)
+    near_left, near_right = [], []
+    for block in range(num_blocks):
+        width = min(block_bits, 64 - block * block_bits)
+        if width <= 0:
+            break
+        mask = np.uint64((1 << width) - 1)
+        block_values = (unique_phash >> np.uint64(block * block_bits)) & mask
+        i, j = _pairs_within_groups(unique_video, block_values)
+        close = hamming_distance(unique_phash[i], unique_phash[j]) <= max_distance
+        near_left.append(representative[i[close]])
+        near_right.append(representative[j[close]])
+
+    left = np.concatenate([exact_left, same_left] + near_left)
+    right = np.concatenate([exact_right, same_right] + near_right)
+    graph = sp.coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(num_files, num_files))
+    _, labels = connected_components(graph, directed=False)
+
+    sizes = np.bincount(labels)
+    in_cluster = sizes[labels] > 1
+    clusters = pd.DataFrame({
+        'file': files[in_cluster],
+        'video': index['videos'][in_cluster],
+        'cluster': labels[in_cluster],
+        'cluster_size': sizes[labels][in_cluster],
+    }).sort_values(['cluster', 'file'], ignore_index=True)
+    # Renumber clusters 0..n-1
+    clusters['cluster'] = pd.factorize(clusters['cluster'])[0]
+    return clusters
+
+if __name__ == "__main__":
+    # Example usage
+    images_folder = 'Datasets/47_logos_dataset/10_classes_final/images'
+    index_path = 'Datasets/47_logos_dataset/10_classes_final/duplicate_index.npz'
+    clusters_path = 'Datasets/47_logos_dataset/10_classes_final/duplicate_clusters.csv'
+
+    index = build_duplicate_index(images_folder, index_path)
+    clusters = find_duplicate_clusters(index, max_distance=4, same_video=True)
+    clusters.to_csv(clusters_path, index=False)
+    redundant = len(clusters) - clusters['cluster'].nunique()
+    print(f"{clusters['cluster'].nunique()} duplicate clusters, {redundant} redundant frames. Saved to {clusters_path}")
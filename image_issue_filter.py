@@ -0,0 +1,125 @@
+"""
+CleanVision issue results as a per-image bitmask and exclusion filter.
+
+issues.csv (from find_issue_in_images) is loaded into one uint16 bitmask per
+image, keyed by file stem so that it lines up with label files and the label
+index. An exclusion policy is a list of issue types, e.g. ['blurry',
+'exact_duplicates']; images with any of these bits set are excluded before the
+dataset is split. For exact duplicates the first image of each identical set is
+kept and only the copies are excluded.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from find_issue_in_images import hash_files
+
+# Bit position of every CleanVision issue type
+ISSUE_BITS = {
+    'dark': 0,
+    'light': 1,
+    'odd_aspect_ratio': 2,
+    'low_information': 3,
+    'blurry': 4,
+    'grayscale': 5,
+    'odd_size': 6,
+    'exact_duplicates': 7,
+    'near_duplicates': 8,
+}
+
+def issue_mask(issue_types):
+    """
+    Combine issue types into one bitmask.
+
+    Args:
+        issue_types (list): Issue type names (keys of ISSUE_BITS).
+
+    Returns:
+        np.uint16: Bitmask with the bits of the given issue types set.
+    """
+    mask = 0
+    for issue_type in issue_types:
+        if issue_type not in ISSUE_BITS:
+            raise ValueError(f"Unknown issue type '{issue_type}'. Expected one of {list(ISSUE_BITS)}")
+        mask |= 1 << ISSUE_BITS[issue_type]
+    return np.uint16(mask)
+
+def load_issue_bitmask(issues_csv):
+    """
+    Load a CleanVision issues.csv into one bitmask per image.
+
+    Args:
+        issues_csv (str): Path to issues.csv (indexed by image path, with 'is_<issue>_issue' columns).
+
+    Returns:
+        pd.Series: uint16 bitmasks indexed by file stem. The image paths are kept in series.attrs['paths']
+                   and, if issues.csv has a 'content_hash' column, the hashes in series.attrs['content_hashes'].
+    """
+    issues = pd.read_csv(issues_csv, index_col=0, dtype={'content_hash': str})
+    bitmask = np.zeros(len(issues), dtype=np.uint16)
+    for issue_type, bit in ISSUE_BITS.items():
+        column = f'is_{issue_type}_issue'
+        if column in issues.columns:
+            bitmask |= issues[column].fillna(False).astype(bool).to_numpy().astype(np.uint16) << bit
+
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in issues.index]
+    series = pd.Series(bitmask, index=pd.Index(stems, name='stem'), name='issues')
+    unique = ~series.index.duplicated()
+    series = series[unique]
+    series.attrs['paths'] = list(issues.index[unique])
+    if 'content_hash' in issues.columns:
+        series.attrs['content_hashes'] = list(issues['content_hash'].to_numpy(dtype=object)[unique])
+    return series
+
+def excluded_stems(bitmask, exclude_issues, keep_one_duplicate=True):
+    """
+    Select the images excluded by a policy.
+
+    Args:
+        bitmask (pd.Series): Output of load_issue_bitmask.
+        exclude_issues (list): Issue types to exclude, e.g. ['blurry', 'exact_duplicates'].
+        keep_one_duplicate (bool): For exact duplicates, keep the first image of each identical
+            set (grouped by the content hashes of issues.csv) instead of excluding all of them.
+
+    Returns:
+        set: File stems of the excluded images.
+    """
+    if not exclude_issues:
+        return set()
+
+    other_issues = [issue_type for issue_type in exclude_issues if issue_type != 'exact_duplicates' or not keep_one_duplicate]
+    excluded = (bitmask & issue_mask(other_issues)) != 0 if other_issues else pd.Series(False, index=bitmask.index)
+
+    if 'exact_duplicates' in exclude_issues and keep_one_duplicate:
+        duplicate = (bitmask & issue_mask(['exact_duplicates'])) != 0
+        if 'content_hashes' in bitmask.attrs:
+            hashes = pd.Series(bitmask.attrs['content_hashes'], index=bitmask.index, dtype=object)[duplicate.to_numpy()].dropna()
+        else:
+            # issues.csv without content hashes (e.g. from find_issues_in_images): hash the duplicates again
+            stem_to_path = dict(zip(bitmask.index, bitmask.attrs.get('paths', [])))
+            duplicate_stems = [stem for stem in bitmask.index[duplicate] if os.path.isfile(stem_to_path.get(stem, ''))]
+            hashes = pd.Series(hash_files([stem_to_path[stem] for stem in duplicate_stems]), index=duplicate_stems, dtype=object)
+        # Exclude every copy but the first (in file name order) of each identical set
+        copies = hashes.sort_index().duplicated(keep='first')
+        excluded |= pd.Series(bitmask.index.isin(copies[copies].index), index=bitmask.index)
+
+    return set(bitmask.index[excluded.to_numpy()])
+
+def load_exclusions(issues_csv, exclude_issues, keep_one_duplicate=True):
+    """
+    Load issues.csv and return the file stems excluded by a policy.
+
+    Args:
+        issues_csv (str): Path to issues.csv.
+        exclude_issues (list): Issue types to exclude.
+        keep_one_duplicate (bool): Keep the first image of each exact-duplicate set.
+
+    Returns:
+        set: File stems of the excluded images.
+    """
+    bitmask = load_issue_bitmask(issues_csv)
+    excluded = excluded_stems(bitmask, exclude_issues, keep_one_duplicate)
+    counts = {issue_type: int(((bitmask & issue_mask([issue_type])) != 0).sum()) for issue_type in exclude_issues}
+    print(f"Images flagged per excluded issue: {counts}")
+    print(f"{len(excluded)} of {len(bitmask)} images excluded by policy {exclude_issues}")
+    return excluded
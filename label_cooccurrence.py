@@ -0,0 +1,127 @@
+"""
+File x class incidence matrix and class co-occurrence analysis.
+
+The label index is turned into a sparse boolean matrix with one row per label
+file and one column per class. Unique-vs-shared counts, the class co-occurrence
+matrix and the files in which a class appears alone are then matrix operations
+on it instead of loops over dict-of-set structures.
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+def build_incidence_matrix(index):
+    """
+    Build the sparse file x class incidence matrix of a label index.
+
+    Args:
+        index (pd.DataFrame): Box-level label index (see label_index.build_label_index).
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix of shape (files, classes) with 1 where the class
+               appears in the file, array of file names, array of class ids).
+    """
+    files, file_codes = np.unique(index['file'].astype(str).to_numpy(), return_inverse=True)
+    classes, class_codes = np.unique(index['class_id'].to_numpy(), return_inverse=True)
+
+    incidence = sp.csr_matrix(
+        (np.ones(len(file_codes), dtype=np.int32), (file_codes, class_codes)),
+        shape=(len(files), len(classes)))
+    # Several boxes of the same class in one file collapse into a single entry
+    incidence.sum_duplicates()
+    incidence.data[:] = 1
+    return incidence, files, classes
+
+def cooccurrence_matrix(incidence):
+    """
+    Count, for every pair of classes, the number of files containing both.
+
+    Args:
+        incidence (scipy.sparse.csr_matrix): File x class incidence matrix.
+
+    Returns:
+        np.ndarray: (classes, classes) matrix; the diagonal holds the number of files per class.
+    """
+    return (incidence.T @ incidence).toarray()
+
+def unique_shared_counts(incidence, classes):
+    """
+    Count the files in which each class is the only class ('unique') or shares the file with others.
+
+    Args:
+        incidence (scipy.sparse.csr_matrix): File x class incidence matrix.
+        classes (np.ndarray): Class ids of the matrix columns.
+
+    Returns:
+        pd.DataFrame: Columns 'label' (class id as a string, like the first token of a label line),
+                      'unique' and 'others'.
+    """
+    single = np.asarray(incidence.sum(axis=1)).ravel() == 1
+    unique = np.asarray(incidence[single].sum(axis=0)).ravel()
+    others = np.asarray(incidence[~single].sum(axis=0)).ravel()
+    return pd.DataFrame({'label': classes.astype(str), 'unique': unique, 'others': others})
+
+def unique_files_per_class(incidence, files, classes):
+    """
+    List the files that contain a single class, together with that class.
+
+    Args:
+        incidence (scipy.sparse.csr_matrix): File x class incidence matrix.
+        files (np.ndarray): File names of the matrix rows.
+        classes (np.ndarray): Class ids of the matrix columns.
+
+    Returns:
+        pd.DataFrame: Columns 'label' (class id as a string, like the first token of a label line)
+                      and 'file_name', sorted by class id.
+    """
+    single_rows = np.flatnonzero(np.diff(incidence.indptr) == 1)
+    # A single-class row has exactly one stored column index
+    single_classes = incidence.indices[incidence.indptr[single_rows]]
+    order = np.argsort(single_classes, kind='stable')
+    return pd.DataFrame({
+        'label': classes[single_classes[order]].astype(str),
+        'file_name': files[single_rows[order]],
+    })
+
+def save_cooccurrence_analysis(output_path, incidence, files, classes):
+    """
+    Save the incidence matrix, co-occurrence matrix and unique/shared counts to one compressed .npz file.
+
+    Args:
+        output_path (str): Path of the .npz file.
+        incidence (scipy.sparse.csr_matrix): File x class incidence matrix.
+        files (np.ndarray): File names of the matrix rows.
+        classes (np.ndarray): Class ids of the matrix columns.
+    """
+    counts = unique_shared_counts(incidence, classes)
+    np.savez_compressed(
+        output_path,
+        files=files.astype(str),
+        classes=classes,
+        incidence_indptr=incidence.indptr,
+        incidence_indices=incidence.indices.astype(np.int16 if len(classes) < 2 ** 15 else np.int32),
+        cooccurrence=cooccurrence_matrix(incidence),
+        unique=counts['unique'].to_numpy(),
+        others=counts['others'].to_numpy(),
+    )
+    print(f"Co-occurrence analysis saved to {output_path}")
+
+def load_incidence_matrix(analysis_path):
+    """
+    Load the incidence matrix saved with save_cooccurrence_analysis.
+
+    Args:
+        analysis_path (str): Path of the .npz file.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix, array of file names, array of class ids).
+    """
+    with np.load(analysis_path) as data:
+        files = data['files']
+        classes = data['classes']
+        indices = data['incidence_indices'].astype(np.int32)
+        indptr = data['incidence_indptr']
+    incidence = sp.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                              shape=(len(files), len(classes)))
+    return incidence, files, classes
@@ -0,0 +1,165 @@
+"""
+Columnar index of YOLO label files.
+
+Every label file of one or more splits is parsed once into a single DataFrame
+with one row per bounding box (file, video, split, class_id, x_center, y_center,
+width, height). Statistics, EDA and analysis scripts can then work on the index
+with grouped pandas/NumPy operations instead of re-reading the label files.
+The index can be saved to and loaded from parquet.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+# Same pattern as get_video_name in dataset_splitter_in_train_val_test (47 & 64 logos dataset)
+VIDEO_NAME_PATTERN = r'(.+)_\d+'
+# Pattern used for the 5_logo_dataset
+VIDEO_NAME_PATTERN_FIRST_TOKEN = r'(.+?)_.*'
+
+INDEX_COLUMNS = ['file', 'video', 'split', 'class_id', 'x_center', 'y_center', 'width', 'height']
+
+
+def _read_label_rows(label_path):
+    """
+    Read the valid (5-column) lines of a YOLO label file.
+
+    Args:
+        label_path (str): Path to the label file.
+
+    Returns:
+        tuple: (text with only valid lines, number of valid lines, number of malformed lines).
+    """
+    with open(label_path, 'r') as file:
+        text = file.read()
+
+    # Checked line by line: a total token count can balance out between malformed lines
+    lines = [line for line in text.splitlines() if line.strip()]
+    valid_lines = [line for line in lines if len(line.split()) == 5]
+    if len(valid_lines) == len(lines):
+        return text, len(lines), 0
+    return '\n'.join(valid_lines), len(valid_lines), len(lines) - len(valid_lines)
+
+
+def build_label_index(label_dir, split=None, video_pattern=VIDEO_NAME_PATTERN, label_files=None):
+    """
+    Parse every label file in a directory into a box-level index.
+
+    Args:
+        label_dir (str): Path to the directory containing YOLO label files.
+        split (str, optional): Name of the split stored in the 'split' column.
+        video_pattern (str): Regex whose first group extracts the video name from the file name.
+        label_files (list, optional): Only index these file names (e.g. a sample) instead of the whole directory.
+
+    Returns:
+        pd.DataFrame: One row per bounding box with the columns in INDEX_COLUMNS. Label files without
+                      valid boxes (e.g. background images) have no rows; their names are listed in
+                      df.attrs['files_without_boxes'].
+    """
+    if label_files is None:
+        label_files = os.listdir(label_dir)
+    label_files = sorted(f for f in label_files if f.endswith('.txt'))
+
+    chunks = []
+    rows_per_file = np.zeros(len(label_files), dtype=np.int64)
+    num_malformed = 0
+    for i, label_file in enumerate(tqdm(label_files, desc=f"Indexing {split or label_dir}")):
+        text, num_rows, num_malformed_rows = _read_label_rows(os.path.join(label_dir, label_file))
+        num_malformed += num_malformed_rows
+        if num_rows:
+            chunks.append(text)
+            rows_per_file[i] = num_rows
+
+    files_without_boxes = [label_file for label_file, num_rows in zip(label_files, rows_per_file) if num_rows == 0]
+    if num_malformed:
+        print(f"Warning: skipped {num_malformed} malformed lines in {label_dir}")
+    if files_without_boxes:
+        print(f"{len(files_without_boxes)} label files in {label_dir} have no valid boxes")
+
+    values = np.array(' '.join(chunks).split(), dtype=np.float64).reshape(-1, 5)
+
+    files = pd.Categorical(np.repeat(np.array(label_files, dtype=object), rows_per_file))
+    # Extract the video name once per file rather than once per box
+    videos = pd.Series(files.categories).str.extract('^' + video_pattern, expand=False)
+    df = pd.DataFrame({
+        'file': files,
+        'video': pd.Categorical(videos.to_numpy()[files.codes]),
+        'split': pd.Categorical([split] * len(values)),
+        'class_id': values[:, 0].astype(np.int32),
+        'x_center': values[:, 1].astype(np.float32),
+        'y_center': values[:, 2].astype(np.float32),
+        'width': values[:, 3].astype(np.float32),
+        'height': values[:, 4].astype(np.float32),
+    })
+    df.attrs['files_without_boxes'] = files_without_boxes
+    return df
+
+
+def build_split_index(split_label_dirs, video_pattern=VIDEO_NAME_PATTERN):
+    """
+    Build a single index over several splits.
+
+    Args:
+        split_label_dirs (dict): Mapping split name -> label directory. Missing directories are skipped.
+        video_pattern (str): Regex whose first group extracts the video name from the file name.
+
+    Returns:
+        pd.DataFrame: Concatenated box-level index with the split recorded per row.
+    """
+    frames = []
+    for split, label_dir in split_label_dirs.items():
+        if label_dir is None or not os.path.isdir(label_dir):
+            print(f"Skipping split '{split}': {label_dir} not found")
+            continue
+        frames.append(build_label_index(label_dir, split=split, video_pattern=video_pattern))
+
+    if not frames:
+        # Same columns and dtypes as a non-empty index
+        frames.append(build_label_index(None, label_files=[]))
+
+    df = pd.concat(frames, ignore_index=True)
+    for column in ('file', 'video'):
+        df[column] = df[column].astype('category')
+    df['split'] = pd.Categorical(df['split'], categories=list(split_label_dirs.keys()))
+    df.attrs['files_without_boxes'] = [file for frame in frames for file in frame.attrs.get('files_without_boxes', [])]
+    return df
+
+
+def save_label_index(df, index_path):
+    """
+    Save a label index to parquet.
+
+    Args:
+        df (pd.DataFrame): Label index.
+        index_path (str): Path of the parquet file.
+    """
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    df.to_parquet(index_path, index=False)
+    print(f"Label index saved to {index_path}")
+
+
+def load_label_index(index_path):
+    """
+    Load a label index saved with save_label_index.
+
+    Args:
+        index_path (str): Path of the parquet file.
+
+    Returns:
+        pd.DataFrame: Label index.
+    """
+    return pd.read_parquet(index_path)
+
+
+if __name__ == "__main__":
+    # Example usage
+    base_dir = 'Datasets/47_logos_dataset/10_classes_final/final/split'
+    index = build_split_index({
+        'train': os.path.join(base_dir, 'train/labels'),
+        'valid': os.path.join(base_dir, 'valid/labels'),
+        'test': os.path.join(base_dir, 'test/labels'),
+    })
+    save_label_index(index, os.path.join(base_dir, 'label_index.parquet'))
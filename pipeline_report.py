@@ -0,0 +1,142 @@
+"""
+Structured reports for validation checks and pipeline runs.
+
+A PipelineReport collects one record per step (wall time, files processed,
+bytes read, files/s) plus the offending files found by each validation rule,
+and saves them as a JSON summary and a parquet table so that runs can be
+diffed and tracked across dataset versions.
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import pandas as pd
+
+
+def folder_size(folder_path):
+    """
+    Count the files in a folder and their total size in bytes.
+
+    Args:
+        folder_path (str): Path to the folder.
+
+    Returns:
+        tuple: (number of files, total size in bytes).
+    """
+    num_files = 0
+    num_bytes = 0
+    if not os.path.isdir(folder_path):
+        return num_files, num_bytes
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                num_files += 1
+                num_bytes += entry.stat().st_size
+    return num_files, num_bytes
+
+
+class PipelineReport:
+    """
+    Collects per-step timings, throughput and offending files for a run.
+    """
+
+    def __init__(self, name):
+        """
+        Initializes an empty report.
+
+        Args:
+            name (str): Name of the run (e.g. 'preprocess_data').
+        """
+        self.name = name
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.steps = []
+        self.offending = []
+
+    @contextmanager
+    def step(self, name, files=0, bytes_read=0):
+        """
+        Time a step. The yielded dict can be updated with 'files', 'bytes_read'
+        and any extra counters before the block exits.
+
+        Args:
+            name (str): Name of the step.
+            files (int): Number of files processed by the step.
+            bytes_read (int): Number of bytes read by the step.
+        """
+        record = {'step': name, 'files': files, 'bytes_read': bytes_read}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            wall_time = time.perf_counter() - start
+            record['wall_time_s'] = round(wall_time, 6)
+            record['files_per_s'] = round(record['files'] / wall_time, 3) if wall_time > 0 else None
+            self.steps.append(record)
+
+    def add_offending(self, step, rule, files):
+        """
+        Record the files flagged by a validation rule.
+
+        Args:
+            step (str): Name of the step that ran the rule.
+            rule (str): Name of the rule.
+            files (list or dict): Offending file names (dict keys are used for dicts).
+        """
+        for file_name in files:
+            self.offending.append({'step': step, 'rule': rule, 'file': file_name})
+
+    def rule_counts(self):
+        """
+        Count offending files per (step, rule). Every rule that ran (a step record with an
+        'offending' counter) is listed, including rules that found nothing.
+
+        Returns:
+            dict: Mapping 'step/rule' -> number of offending files.
+        """
+        counts = {record['step']: 0 for record in self.steps if 'offending' in record}
+        for row in self.offending:
+            key = f"{row['step']}/{row['rule']}"
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def to_dict(self):
+        """
+        Summarize the report as a JSON-serializable dictionary.
+
+        Returns:
+            dict: Report summary.
+        """
+        total_time = sum(step['wall_time_s'] for step in self.steps)
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'total_wall_time_s': round(total_time, 6),
+            'total_bytes_read': sum(step['bytes_read'] for step in self.steps),
+            'steps': self.steps,
+            'rule_counts': self.rule_counts(),
+        }
+
+    def save(self, json_path, parquet_path=None):
+        """
+        Save the summary as JSON and the offending files as parquet.
+
+        Args:
+            json_path (str): Path of the JSON summary.
+            parquet_path (str, optional): Path of the offending-files table.
+                Defaults to the JSON path with an '_offending.parquet' suffix.
+        """
+        if parquet_path is None:
+            parquet_path = os.path.splitext(json_path)[0] + '_offending.parquet'
+        for path in (json_path, parquet_path):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        with open(json_path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=4)
+
+        df = pd.DataFrame(self.offending, columns=['step', 'rule', 'file'])
+        df.to_parquet(parquet_path, index=False)
+        print(f"Report saved to {json_path} and {parquet_path}")
@@ -0,0 +1,231 @@
+"""
+Redundant-frame pruning for video-derived datasets.
+
+Frames are grouped per video (see get_video_name) and walked in frame order. A
+frame is kept only if, compared to the last kept frame of the same video:
+- its set of classes changed, or
+- one of its boxes moved (best same-class IoU below iou_threshold), or
+- its image content changed (perceptual hash distance above phash_threshold,
+  when a duplicate index from frame_duplicate_index is given; frames missing
+  from that index are always kept), or
+- more than max_gap frames passed since the last kept frame.
+
+The result is a manifest of all frames with a keep flag and a reason, plus a
+per-class report of the reduction. Label files without boxes (background
+frames) are always kept and listed with reason 'empty'. The kept frames can be
+linked into a new dataset folder.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from label_index import build_label_index, VIDEO_NAME_PATTERN
+from frame_duplicate_index import load_duplicate_index, hamming_distance
+from class_rebalancing import apply_rebalance_plan
+
+def pairwise_iou(boxes_a, boxes_b):
+    """
+    Compute the IoU between every pair of YOLO boxes (x_center, y_center, width, height).
+
+    Args:
+        boxes_a (np.ndarray): (N, 4) boxes.
+        boxes_b (np.ndarray): (M, 4) boxes.
+
+    Returns:
+        np.ndarray: (N, M) IoU matrix.
+    """
+    a_min = boxes_a[:, None, :2] - boxes_a[:, None, 2:] / 2
+    a_max = boxes_a[:, None, :2] + boxes_a[:, None, 2:] / 2
+    b_min = boxes_b[None, :, :2] - boxes_b[None, :, 2:] / 2
+    b_max = boxes_b[None, :, :2] + boxes_b[None, :, 2:] / 2
+
+    overlap = np.clip(np.minimum(a_max, b_max) - np.maximum(a_min, b_min), 0, None)
+    intersection = overlap[..., 0] * overlap[..., 1]
+    area_a = boxes_a[:, 2] * boxes_a[:, 3]
+    area_b = boxes_b[:, 2] * boxes_b[:, 3]
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-12), 0.0)
+
+def boxes_changed(classes_a, boxes_a, classes_b, boxes_b, iou_threshold):
+    """
+    Check whether two frames' annotations differ.
+
+    Args:
+        classes_a (np.ndarray): Class ids of the first frame.
+        boxes_a (np.ndarray): (N, 4) boxes of the first frame.
+        classes_b (np.ndarray): Class ids of the second frame.
+        boxes_b (np.ndarray): (M, 4) boxes of the second frame.
+        iou_threshold (float): Minimum IoU for a box to count as unmoved.
+
+    Returns:
+        str or None: 'classes' or 'boxes' if the frames differ, None otherwise.
+    """
+    if len(classes_a) != len(classes_b) or not np.array_equal(np.sort(classes_a), np.sort(classes_b)):
+        return 'classes'
+    if len(classes_a) == 0:
+        return None
+    iou = pairwise_iou(boxes_a, boxes_b)
+    iou[classes_a[:, None] != classes_b[None, :]] = 0
+    if iou.max(axis=1).min() < iou_threshold:
+        return 'boxes'
+    return None
+
+def plan_frame_pruning(index, iou_threshold=0.9, duplicate_index=None, phash_threshold=6, max_gap=None):
+    """
+    Decide which frames to keep.
+
+    Args:
+        index (pd.DataFrame): Box-level label index (see label_index.build_label_index).
+        iou_threshold (float): Minimum same-class IoU for a box to count as unmoved.
+        duplicate_index (dict, optional): Output of frame_duplicate_index.build_duplicate_index.
+            If given, frames whose perceptual hash differs by more than phash_threshold are kept.
+        phash_threshold (int): Hamming distance above which the image content counts as changed.
+        max_gap (int, optional): Always keep a frame if more than max_gap frames passed since the last kept one.
+
+    Returns:
+        pd.DataFrame: Manifest with 'file', 'video', 'frame', 'kept' and 'reason' (one row per label file).
+                      Label files without boxes (index.attrs['files_without_boxes']) are always kept,
+                      with reason 'empty'.
+    """
+    empty_files = sorted(index.attrs.get('files_without_boxes', []))
+    index = index.assign(file=index['file'].astype(str)).sort_values('file', kind='stable')
+    files, starts = np.unique(index['file'].to_numpy(), return_index=True)
+    ends = np.append(starts[1:], len(index))
+    classes = index['class_id'].to_numpy()
+    boxes = index[['x_center', 'y_center', 'width', 'height']].to_numpy(np.float64)
+
+    stems = pd.Series([os.path.splitext(f)[0] for f in files], dtype=object)
+    frames = stems.str.extract(r'_(\d+)$', expand=False).fillna(-1).astype(np.int64).to_numpy()
+    videos = index.groupby('file', sort=True)['video'].first().astype(str).reindex(files).to_numpy()
+
+    phashes = None
+    if duplicate_index is not None:
+        stem_to_hash = pd.Series(duplicate_index['phash'],
+                                 index=[os.path.splitext(f)[0] for f in duplicate_index['files']])
+        stem_to_hash = stem_to_hash[~stem_to_hash.index.duplicated()]
+        # Look up positions instead of reindexing, which would turn the uint64 hashes into float64
+        positions = stem_to_hash.index.get_indexer(stems)
+        has_hash = positions >= 0
+        # Position -1 (frame not in the index) picks the trailing placeholder
+        phashes = np.append(stem_to_hash.to_numpy(dtype=np.uint64), np.uint64(0))[positions]
+
+    kept = np.zeros(len(files), dtype=bool)
+    reasons = np.full(len(files), '', dtype=object)
+    order = np.lexsort((frames, videos))
+    last = -1
+    for i in tqdm(order, desc="Pruning frames"):
+        if last < 0 or videos[i] != videos[last]:
+            reason = 'first'
+        elif max_gap is not None and frames[i] - frames[last] > max_gap:
+            reason = 'gap'
+        else:
+            reason = boxes_changed(classes[starts[i]:ends[i]], boxes[starts[i]:ends[i]],
+                                   classes[starts[last]:ends[last]], boxes[starts[last]:ends[last]], iou_threshold)
+            if reason is None and phashes is not None:
+                if not has_hash[i]:
+                    # Without a hash the image content cannot be compared, so the frame is kept
+                    reason = 'unindexed'
+                elif has_hash[last] and hamming_distance(phashes[i:i + 1], phashes[last:last + 1])[0] > phash_threshold:
+                    reason = 'image'
+        if reason is not None:
+            kept[i] = True
+            reasons[i] = reason
+            last = i
+
+    manifest = pd.DataFrame({'file': files, 'video': videos, 'frame': frames, 'kept': kept, 'reason': reasons})
+    if empty_files:
+        # Background frames carry no boxes to compare and are linked into the output anyway
+        empty_stems = pd.Series([os.path.splitext(f)[0] for f in empty_files], dtype=object)
+        empty = pd.DataFrame({
+            'file': empty_files,
+            'video': empty_stems.str.extract('^' + VIDEO_NAME_PATTERN, expand=False).to_numpy(dtype=object),
+            'frame': empty_stems.str.extract(r'_(\d+)$', expand=False).fillna(-1).astype(np.int64).to_numpy(),
+            'kept': True,
+            'reason': 'empty',
+        })
+        manifest = pd.concat([manifest, empty], ignore_index=True).sort_values('file', ignore_index=True)
+    return manifest
+
+def pruning_report(index, manifest):
+    """
+    Report the reduction in files and boxes per class.
+
+    Args:
+        index (pd.DataFrame): Box-level label index.
+        manifest (pd.DataFrame): Output of plan_frame_pruning.
+
+    Returns:
+        pd.DataFrame: Columns 'class_id', 'files_before', 'files_after', 'boxes_before', 'boxes_after', 'reduction_pct'.
+    """
+    kept_files = manifest.loc[manifest['kept'], 'file']
+    is_kept = index['file'].astype(str).isin(kept_files)
+    boxes_before = index.groupby('class_id').size()
+    boxes_after = index[is_kept].groupby('class_id').size().reindex(boxes_before.index, fill_value=0)
+    files_before = index.groupby('class_id')['file'].nunique()
+    files_after = index[is_kept].groupby('class_id')['file'].nunique().reindex(boxes_before.index, fill_value=0)
+
+    report = pd.DataFrame({
+        'files_before': files_before,
+        'files_after': files_after,
+        'boxes_before': boxes_before,
+        'boxes_after': boxes_after,
+    })
+    report['reduction_pct'] = (1 - report['boxes_after'] / report['boxes_before']) * 100
+    return report.rename_axis('class_id').reset_index()
+
+def prune_redundant_frames(labels_folder, manifest_path, images_folder=None, output_folder=None, duplicate_index_path=None,
+                           iou_threshold=0.9, phash_threshold=6, max_gap=None):
+    """
+    Plan the pruning of a label folder, save the manifest and optionally link the kept frames into a new folder.
+
+    Args:
+        labels_folder (str): Path to the folder containing YOLO label files.
+        manifest_path (str): Path of the manifest (.parquet or .csv). The per-class report is saved next to it.
+        images_folder (str, optional): Path to the folder containing images (needed with output_folder).
+        output_folder (str, optional): Link the kept images and labels into output_folder/images and output_folder/labels.
+        duplicate_index_path (str, optional): Path of a duplicate index .npz used for the image content check.
+        iou_threshold (float): Minimum same-class IoU for a box to count as unmoved.
+        phash_threshold (int): Hamming distance above which the image content counts as changed.
+        max_gap (int, optional): Always keep a frame if more than max_gap frames passed since the last kept one.
+
+    Returns:
+        tuple: (manifest DataFrame, per-class report DataFrame).
+
+    Raises:
+        ValueError: If output_folder is given without images_folder.
+    """
+    if output_folder and not images_folder:
+        raise ValueError("images_folder is required to link the kept frames into output_folder")
+    index = build_label_index(labels_folder)
+    duplicate_index = load_duplicate_index(duplicate_index_path) if duplicate_index_path else None
+    manifest = plan_frame_pruning(index, iou_threshold, duplicate_index, phash_threshold, max_gap)
+    report = pruning_report(index, manifest)
+
+    os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+    report_path = os.path.splitext(manifest_path)[0] + '_report.csv'
+    if manifest_path.endswith('.csv'):
+        manifest.to_csv(manifest_path, index=False)
+    else:
+        manifest.to_parquet(manifest_path, index=False)
+    report.to_csv(report_path, index=False)
+    print(report.to_string(index=False))
+    print(f"Kept {int(manifest['kept'].sum())} of {len(manifest)} frames. Manifest saved to {manifest_path}, report to {report_path}")
+
+    if output_folder:
+        apply_rebalance_plan(manifest[~manifest['kept']], images_folder, labels_folder, output_folder)
+
+    return manifest, report
+
+if __name__ == "__main__":
+    # Example usage
+    base_dir = 'Datasets/47_logos_dataset/10_classes_final'
+    prune_redundant_frames(
+        labels_folder=os.path.join(base_dir, 'labels'),
+        manifest_path=os.path.join(base_dir, 'pruned_manifest.parquet'),
+        images_folder=os.path.join(base_dir, 'images'),
+        output_folder=os.path.join(base_dir, 'pruned'),
+        duplicate_index_path=os.path.join(base_dir, 'duplicate_index.npz'),
+        iou_threshold=0.9,
+        max_gap=25
+    )
@@ -0,0 +1,189 @@
+"""
+Sampling-based quick statistics for a label folder.
+
+Instead of reading every label file, a random subset stratified by video (see
+get_video_name) is read and the results are scaled up:
+- per-class instance counts with the stratified estimator and its confidence interval,
+- frames per video (exact, from the directory listing only),
+- box size quantiles with bootstrap confidence intervals.
+
+Usage:
+    python quick_stats.py <labels_folder> --sample 0.05 [--output quick_stats.csv]
+"""
+
+import os
+import argparse
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from label_index import build_label_index, VIDEO_NAME_PATTERN
+
+# Two-sided normal quantiles for the supported confidence levels
+Z_SCORES = {0.90: 1.6449, 0.95: 1.9600, 0.99: 2.5758}
+
+def sample_label_files(labels_folder, fraction=0.05, min_per_video=2, seed=0, video_pattern=VIDEO_NAME_PATTERN):
+    """
+    Draw a random sample of label files stratified by video.
+
+    Args:
+        labels_folder (str): Path to the folder containing YOLO label files.
+        fraction (float): Fraction of the files of each video to sample.
+        min_per_video (int): Minimum number of files sampled per video (all files if the video has fewer).
+        seed (int): Random seed.
+        video_pattern (str): Regex whose first group extracts the video name from the file name.
+
+    Returns:
+        pd.DataFrame: One row per file with 'file', 'video', 'video_files' (N_v),
+                      'video_sampled' (n_v) and 'sampled' (bool).
+    """
+    files = pd.Series(sorted(f for f in os.listdir(labels_folder) if f.endswith('.txt')), dtype=object)
+    videos = files.str.extract('^' + video_pattern, expand=False).fillna('')
+
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(files))
+    df = pd.DataFrame({'file': files.to_numpy()[order], 'video': videos.to_numpy()[order]})
+
+    df['video_files'] = df.groupby('video')['file'].transform('size')
+    df['video_sampled'] = np.minimum(
+        df['video_files'],
+        np.maximum(np.ceil(fraction * df['video_files']).astype(np.int64), min_per_video))
+    # The files are in random order, so the first n_v of each video form a simple random sample
+    df['sampled'] = df.groupby('video').cumcount() < df['video_sampled']
+    return df
+
+def estimate_class_counts(sample_index, strata, confidence=0.95):
+    """
+    Estimate per-class instance totals from a stratified sample.
+
+    Args:
+        sample_index (pd.DataFrame): Label index of the sampled files.
+        strata (pd.DataFrame): Output of sample_label_files.
+        confidence (float): Confidence level (0.90, 0.95 or 0.99).
+
+    Returns:
+        pd.DataFrame: Columns 'class_id', 'estimate', 'ci_low', 'ci_high', 'sampled_instances'.
+    """
+    sampled = strata[strata['sampled']].reset_index(drop=True)
+    file_rows = pd.Series(np.arange(len(sampled)), index=sampled['file'])
+    classes, class_codes = np.unique(sample_index['class_id'].to_numpy(), return_inverse=True)
+    rows = file_rows.reindex(sample_index['file'].astype(str)).to_numpy()
+
+    # Instances per sampled file and class (files without boxes are zero rows)
+    y = sp.csr_matrix((np.ones(len(rows)), (rows, class_codes)), shape=(len(sampled), len(classes)))
+    y.sum_duplicates()
+
+    video_codes, videos = pd.factorize(sampled['video'])
+    membership = sp.csr_matrix((np.ones(len(sampled)), (video_codes, np.arange(len(sampled)))),
+                               shape=(len(videos), len(sampled)))
+    s1 = (membership @ y).toarray()
+    s2 = (membership @ y.multiply(y)).toarray()
+
+    per_video = sampled.groupby(video_codes)[['video_files', 'video_sampled']].first()
+    big_n = per_video['video_files'].to_numpy(dtype=np.float64)[:, None]
+    small_n = per_video['video_sampled'].to_numpy(dtype=np.float64)[:, None]
+
+    mean = s1 / small_n
+    # Sample variance per stratum; strata with a single sampled file contribute no variance
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = np.where(small_n > 1, (s2 - small_n * mean ** 2) / (small_n - 1), 0.0)
+    estimate = (big_n * mean).sum(axis=0)
+    estimate_variance = (big_n ** 2 * (1 - small_n / big_n) * variance / small_n).sum(axis=0)
+    margin = Z_SCORES[confidence] * np.sqrt(estimate_variance)
+
+    return pd.DataFrame({
+        'class_id': classes,
+        'estimate': np.round(estimate).astype(np.int64),
+        'ci_low': np.maximum(np.floor(estimate - margin), s1.sum(axis=0)).astype(np.int64),
+        'ci_high': np.ceil(estimate + margin).astype(np.int64),
+        'sampled_instances': s1.sum(axis=0).astype(np.int64),
+    })
+
+def estimate_box_size_quantiles(sample_index, strata, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95),
+                                image_width=1920, image_height=1080, confidence=0.95, num_bootstrap=200, seed=0):
+    """
+    Estimate quantiles of the box size sqrt(w * h) in pixels, with bootstrap confidence intervals.
+    Boxes are weighted by the inverse sampling fraction of their video.
+
+    Args:
+        sample_index (pd.DataFrame): Label index of the sampled files.
+        strata (pd.DataFrame): Output of sample_label_files.
+        quantiles (tuple): Quantiles to estimate.
+        image_width (int): Image width in pixels.
+        image_height (int): Image height in pixels.
+        confidence (float): Confidence level of the intervals.
+        num_bootstrap (int): Number of bootstrap resamples.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: Columns 'quantile', 'estimate', 'ci_low', 'ci_high' (pixels), empty if the
+                      sampled files contain no boxes.
+    """
+    sampled = strata[strata['sampled']].set_index('file')
+    weights = (sampled['video_files'] / sampled['video_sampled']).reindex(sample_index['file'].astype(str)).to_numpy()
+    if not weights.sum() > 0:
+        return pd.DataFrame(columns=['quantile', 'estimate', 'ci_low', 'ci_high'], dtype=np.float64)
+    weights = weights / weights.sum()
+    size = np.sqrt(sample_index['width'].to_numpy(np.float64) * image_width *
+                   sample_index['height'].to_numpy(np.float64) * image_height)
+
+    rng = np.random.default_rng(seed)
+    # Weighted bootstrap: resampling with probabilities proportional to the weights
+    boot = np.array([np.quantile(size[rng.choice(len(size), size=len(size), p=weights)], quantiles)
+                     for _ in range(num_bootstrap)]).T
+    alpha = (1 - confidence) / 2
+
+    order = np.argsort(size)
+    cumulative = np.cumsum(weights[order])
+    point = size[order][np.minimum(np.searchsorted(cumulative, quantiles), len(size) - 1)]
+
+    return pd.DataFrame({
+        'quantile': quantiles,
+        'estimate': point,
+        'ci_low': np.quantile(boot, alpha, axis=1),
+        'ci_high': np.quantile(boot, 1 - alpha, axis=1),
+    })
+
+def quick_statistics(labels_folder, fraction=0.05, confidence=0.95, seed=0, video_pattern=VIDEO_NAME_PATTERN):
+    """
+    Compute sampling-based statistics of a label folder.
+
+    Args:
+        labels_folder (str): Path to the folder containing YOLO label files.
+        fraction (float): Fraction of the files of each video to read.
+        confidence (float): Confidence level of the intervals (0.90, 0.95 or 0.99).
+        seed (int): Random seed.
+        video_pattern (str): Regex whose first group extracts the video name from the file name.
+
+    Returns:
+        dict: 'class_counts', 'frames_per_video' and 'box_size_quantiles' DataFrames.
+    """
+    strata = sample_label_files(labels_folder, fraction, seed=seed, video_pattern=video_pattern)
+    sample_files = strata.loc[strata['sampled'], 'file'].tolist()
+    print(f"Reading {len(sample_files)} of {len(strata)} label files from {strata['video'].nunique()} videos")
+
+    sample_index = build_label_index(labels_folder, video_pattern=video_pattern, label_files=sample_files)
+    if sample_index.empty:
+        print("Warning: the sampled label files contain no boxes, the class and box size statistics are empty")
+
+    frames_per_video = strata.groupby('video')['video_files'].first()
+    return {
+        'class_counts': estimate_class_counts(sample_index, strata, confidence),
+        'frames_per_video': frames_per_video.describe().to_frame('frames_per_video'),
+        'box_size_quantiles': estimate_box_size_quantiles(sample_index, strata, confidence=confidence, seed=seed),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quick sampling-based statistics of a YOLO label folder.")
+    parser.add_argument('labels_folder', help="Path to the folder containing YOLO label files.")
+    parser.add_argument('--sample', type=float, default=0.05, help="Fraction of the files of each video to read.")
+    parser.add_argument('--confidence', type=float, default=0.95, choices=sorted(Z_SCORES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Optional CSV file for the per-class estimates.")
+    args = parser.parse_args()
+
+    stats = quick_statistics(args.labels_folder, args.sample, args.confidence, args.seed)
+    for name, df in stats.items():
+        print(f"\n{name}:\n{df.to_string()}")
+    if args.output:
+        stats['class_counts'].to_csv(args.output, index=False)
+        print(f"Per-class estimates saved to {args.output}")
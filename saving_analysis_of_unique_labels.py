@@ -1,6 +1,5 @@
-import os
-import pandas as pd
-from collections import defaultdict
+from label_index import build_label_index
+from label_cooccurrence import build_incidence_matrix, unique_files_per_class
 
 def analyze_labels(labels_folder):
     """
@@ -13,38 +12,12 @@ def analyze_labels(labels_folder):
     Returns:
         pd.DataFrame: A DataFrame with two columns: 'label' and 'file_name' for unique labels.
     """
-    # Initialize data structures
-    label_to_files = defaultdict(set)
-    file_to_labels = {}
+    # Build the sparse file x class incidence matrix
+    index = build_label_index(labels_folder)
+    incidence, files, classes = build_incidence_matrix(index)
 
-    # Iterate over label files and extract labels
-    for label_file in os.listdir(labels_folder):
-        if label_file.endswith(".txt"):
-            file_path = os.path.join(labels_folder, label_file)
-            with open(file_path, 'r') as file:
-                labels = set()
-                for line in file:
-                    parts = line.strip().split()
-                    if parts:
-                        labels.add(parts[0])
-                file_to_labels[label_file] = labels
-                for label in labels:
-                    label_to_files[label].add(label_file)
-
-    # Initialize a list to hold the unique labels and file names
-    unique_data = []
-
-    # Analyze labels
-    for label, files in label_to_files.items():
-        # Identify files where the label is unique
-        unique_files = [f for f in files if len(file_to_labels[f]) == 1]
-        
-        # Add unique labels and file names to the list
-        for file_name in unique_files:
-            unique_data.append({'label': label, 'file_name': file_name})
-
-    # Convert the results to a DataFrame
-    df_unique = pd.DataFrame(unique_data)
+    # Files with a single label, together with that label
+    df_unique = unique_files_per_class(incidence, files, classes)
 
     return df_unique
 
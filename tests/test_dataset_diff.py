@@ -0,0 +1,44 @@
+"""
+Tests of the dataset version diff.
+"""
+
+from dataset_diff import load_index, diff_label_indexes
+
+BOX = '0 0.5 0.5 0.2 0.2\n'
+OTHER_BOX = '1 0.25 0.25 0.1 0.1\n'
+
+def write_version(base, files):
+    for split, name, text in files:
+        labels = base / split / 'labels'
+        labels.mkdir(parents=True, exist_ok=True)
+        (labels / name).write_text(text)
+    return load_index(str(base))
+
+def test_moved_counts_match_the_file_rows(tmp_path):
+    old = write_version(tmp_path / 'old', [
+        ('train', 'a_0.txt', BOX), ('train', 'b_0.txt', BOX), ('train', 'c_0.txt', BOX), ('valid', 'd_0.txt', BOX)])
+    new = write_version(tmp_path / 'new', [
+        ('valid', 'a_0.txt', BOX), ('valid', 'b_0.txt', OTHER_BOX), ('train', 'c_0.txt', OTHER_BOX), ('test', 'e_0.txt', BOX)])
+    diff = diff_label_indexes(old, new)
+    changes = diff['files'].set_index('file')['change']
+    assert changes.to_dict() == {'a_0.txt': 'moved', 'b_0.txt': 'modified', 'c_0.txt': 'modified',
+                                 'd_0.txt': 'removed', 'e_0.txt': 'added'}
+
+    summary = diff['summary']
+    counts = changes.value_counts()
+    for change in ('added', 'removed', 'modified', 'moved'):
+        assert summary[change] == counts.get(change, 0)
+    modified = diff['files'][diff['files']['change'] == 'modified']
+    assert summary['modified_and_moved'] == (modified['old_split'] != modified['new_split']).sum() == 1
+
+def test_name_in_two_splits_is_reported_as_conflict(tmp_path):
+    old = write_version(tmp_path / 'old', [('train', 'a_0.txt', BOX), ('valid', 'a_0.txt', BOX)])
+    new = write_version(tmp_path / 'new', [('train', 'a_0.txt', BOX)])
+    diff = diff_label_indexes(old, new)
+    assert diff['summary']['old_conflicts'] == 1
+    assert diff['summary']['new_conflicts'] == 0
+    conflicts = diff['files'][diff['files']['change'] == 'old_conflict']
+    assert conflicts[['file', 'old_split']].values.tolist() == [['a_0.txt', 'train,valid']]
+    # The split is the list of both splits, not whichever split was read last
+    modified = diff['files'][diff['files']['change'] == 'modified']
+    assert modified[['file', 'old_split', 'new_split']].values.tolist() == [['a_0.txt', 'train,valid', 'train']]
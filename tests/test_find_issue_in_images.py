@@ -0,0 +1,35 @@
+"""
+Tests of the incremental CleanVision issue detection.
+"""
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from find_issue_in_images import find_issues_in_images_incremental, odd_size_scores, image_size
+from thumbnail_cache import ThumbnailCache
+
+def write_images(folder, sizes):
+    folder.mkdir()
+    for i, (width, height) in enumerate(sizes):
+        Image.new('RGB', (width, height), (i * 20, 100, 50)).save(folder / f'video_{i}.png')
+    return sorted(str(path) for path in folder.iterdir())
+
+def test_odd_size_is_scored_over_the_whole_folder(tmp_path):
+    sizes = [(60 + i, 60 + i) for i in range(9)] + [(640, 640)]
+    paths = write_images(tmp_path / 'images', sizes)
+    # Chunks of two images: per-chunk quartiles would not flag the large image
+    issues = find_issues_in_images_incremental(str(tmp_path / 'images'), str(tmp_path / 'out'), num_workers=1,
+                                               chunk_size=2, issue_types=['odd_size'])
+    expected_scores, expected_issues = odd_size_scores(np.array([image_size(path) for path in paths]))
+    assert np.allclose(issues.loc[paths, 'odd_size_score'].to_numpy(dtype=np.float64), expected_scores)
+    assert issues.loc[paths, 'is_odd_size_issue'].tolist() == expected_issues.tolist()
+    assert issues['is_odd_size_issue'].sum() == 1 and issues.loc[paths[-1], 'is_odd_size_issue']
+
+def test_unscored_images_are_not_counted_as_issues(tmp_path):
+    write_images(tmp_path / 'images', [(64, 64)] * 3)
+    (tmp_path / 'images' / 'video_9.jpg').write_bytes(b'not an image')
+    issues = find_issues_in_images_incremental(str(tmp_path / 'images'), str(tmp_path / 'out'), num_workers=1,
+                                               issue_types=['odd_size'], thumbnail_cache=ThumbnailCache(str(tmp_path / 'cache')))
+    assert issues['content_hash'].isna().sum() == 1
+    summary = pd.read_csv(tmp_path / 'out' / 'issue_summary.csv', index_col=0).set_index('issue_type')['num_images']
+    assert summary.to_dict() == {'odd_size': 0, 'exact_duplicates': 0}
@@ -0,0 +1,24 @@
+"""
+Tests of the columnar label index.
+"""
+
+import numpy as np
+import pandas as pd
+from label_index import build_label_index, build_split_index
+
+def test_malformed_lines_are_skipped_line_by_line(tmp_path):
+    # 4 + 6 tokens add up to two lines' worth of tokens, but neither line is valid
+    (tmp_path / 'video_0.txt').write_text('0 0.5 0.5 0.1\n1 0.5 0.5 0.1 0.1 7\n')
+    (tmp_path / 'video_1.txt').write_text('0 0.5 0.5 0.1\n2 0.25 0.25 0.1 0.2\n1 0.5 0.5 0.1 0.1 7\n')
+    index = build_label_index(str(tmp_path))
+    assert index['file'].astype(str).tolist() == ['video_1.txt']
+    assert index['class_id'].tolist() == [2]
+    assert np.allclose(index[['x_center', 'y_center', 'width', 'height']].to_numpy(), [[0.25, 0.25, 0.1, 0.2]])
+    assert index.attrs['files_without_boxes'] == ['video_0.txt']
+
+def test_empty_split_index_has_typed_columns(tmp_path):
+    index = build_split_index({'train': str(tmp_path / 'missing'), 'valid': None})
+    assert index.empty
+    assert isinstance(index['split'].dtype, pd.CategoricalDtype)
+    assert list(index['split'].cat.categories) == ['train', 'valid']
+    assert index['class_id'].dtype == np.int32
@@ -0,0 +1,44 @@
+"""
+Tests of the redundant-frame pruning stage.
+"""
+
+import numpy as np
+import pytest
+from label_index import build_label_index
+from prune_redundant_frames import plan_frame_pruning, prune_redundant_frames
+
+BOX = '0 0.5 0.5 0.2 0.2\n'
+
+def write_labels(folder, texts):
+    folder.mkdir()
+    for name, text in texts.items():
+        (folder / name).write_text(text)
+    return build_label_index(str(folder))
+
+def test_frame_missing_from_duplicate_index_keeps_uint64_hashes(tmp_path):
+    index = write_labels(tmp_path / 'labels', {f'video_{frame}.txt': BOX for frame in range(4)})
+    # Hashes above 2**53 whose low bits differ: a float64 round trip would make them equal
+    base = np.uint64(2 ** 63 + 0x1000)
+    duplicate_index = {
+        'files': np.array(['video_0.png', 'video_1.png', 'video_2.png']),
+        'phash': np.array([base, base ^ np.uint64(0x7F), base ^ np.uint64(0x7E)], dtype=np.uint64),
+    }
+    manifest = plan_frame_pruning(index, duplicate_index=duplicate_index, phash_threshold=6)
+    assert manifest['reason'].tolist() == ['first', 'image', '', 'unindexed']
+    assert manifest['kept'].tolist() == [True, True, False, True]
+
+def test_label_files_without_boxes_are_listed_as_empty(tmp_path):
+    index = write_labels(tmp_path / 'labels', {'video_0.txt': BOX, 'video_1.txt': BOX, 'video_2.txt': ''})
+    manifest = plan_frame_pruning(index)
+    assert manifest[['file', 'video', 'frame', 'kept', 'reason']].values.tolist() == [
+        ['video_0.txt', 'video', 0, True, 'first'],
+        ['video_1.txt', 'video', 1, False, ''],
+        ['video_2.txt', 'video', 2, True, 'empty'],
+    ]
+
+def test_output_folder_requires_images_folder(tmp_path):
+    write_labels(tmp_path / 'labels', {'video_0.txt': BOX})
+    manifest_path = tmp_path / 'manifest.parquet'
+    with pytest.raises(ValueError):
+        prune_redundant_frames(str(tmp_path / 'labels'), str(manifest_path), output_folder=str(tmp_path / 'out'))
+    assert not manifest_path.exists()
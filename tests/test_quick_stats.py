@@ -0,0 +1,14 @@
+"""
+Tests of the sampling-based quick statistics.
+"""
+
+from quick_stats import quick_statistics
+
+def test_sample_without_boxes_returns_empty_statistics(tmp_path):
+    for frame in range(4):
+        (tmp_path / f'video_{frame}.txt').write_text('')
+    stats = quick_statistics(str(tmp_path), fraction=0.5)
+    assert stats['class_counts'].empty
+    assert stats['box_size_quantiles'].empty
+    assert list(stats['box_size_quantiles'].columns) == ['quantile', 'estimate', 'ci_low', 'ci_high']
+    assert stats['frames_per_video'].loc['count', 'frames_per_video'] == 1
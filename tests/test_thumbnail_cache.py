@@ -0,0 +1,38 @@
+"""
+Tests of the thumbnail cache and of the exact-duplicate grouping built on it.
+"""
+
+import os
+import numpy as np
+from PIL import Image
+from thumbnail_cache import ThumbnailCache
+from frame_duplicate_index import find_duplicate_clusters
+
+def write_images(folder, num_images):
+    folder.mkdir()
+    paths = []
+    for i in range(num_images):
+        pixels = np.random.default_rng(i).integers(0, 256, (96, 128, 3), dtype=np.uint8)
+        paths.append(str(folder / f'video_{i}.png'))
+        Image.fromarray(pixels).save(paths[-1])
+    return paths
+
+def test_build_never_evicts_the_thumbnails_it_returns(tmp_path):
+    paths = write_images(tmp_path / 'images', 4)
+    # A budget smaller than a single thumbnail: everything not in use is evicted
+    cache = ThumbnailCache(str(tmp_path / 'cache'), max_side=64, size_budget_bytes=1)
+    for batch in ([paths[0]], paths[1:3], [paths[0], paths[3]], [paths[1]]):
+        hashes = cache.build(batch, num_workers=1)
+        assert all(os.path.exists(cache.thumbnail_path(content_hash)) for content_hash in hashes)
+
+def test_frames_without_sha1_are_not_exact_duplicates():
+    # Undecodable frames have an empty SHA-1 and no perceptual hash
+    index = {
+        'files': np.array(['video_0.jpg', 'video_1.jpg', 'video_2.jpg', 'video_3.jpg']),
+        'videos': np.array(['video'] * 4),
+        'sha1': np.array([b'', b'', b'a' * 20, b'a' * 20], dtype='S20'),
+        'phash': np.array([0, 0, 2 ** 40, 2 ** 40], dtype=np.uint64),
+        'valid': np.array([False, False, True, True]),
+    }
+    clusters = find_duplicate_clusters(index)
+    assert clusters['file'].tolist() == ['video_2.jpg', 'video_3.jpg']
@@ -0,0 +1,246 @@
+"""
+Content-hash keyed thumbnail cache shared by image-quality checks and visualizations.
+
+Thumbnails (longest side max_side, JPEG or WebP) are stored as
+<cache_dir>/<hash[:2]>/<hash>.<ext>, where hash is the SHA-1 of the source
+image content, so renamed or copied frames share one thumbnail. An index
+(index.parquet) maps source path, size and mtime to the content hash, so that
+unchanged images are neither re-read nor re-hashed on later passes. Thumbnails
+are built in parallel, and the cache is trimmed to a size budget by removing the
+least recently used thumbnails.
+"""
+
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+INDEX_FILE = 'index.parquet'
+INDEX_COLUMNS = ['path', 'size', 'mtime_ns', 'content_hash']
+
+# JPEG decoding can downscale by 2, 4 or 8 while decoding
+REDUCED_READ_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                      4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+def _make_thumbnail(job):
+    """
+    Hash one image and write its thumbnail if missing (executed in a worker process).
+
+    Args:
+        job (tuple): (source path, cache directory, max side, extension, encode params, decode reduction).
+
+    Returns:
+        str or None: Content hash, or None if the image could not be decoded.
+    """
+    path, cache_dir, max_side, extension, encode_params, reduction = job
+    with open(path, 'rb') as file:
+        content = file.read()
+    content_hash = hashlib.sha1(content).hexdigest()
+    thumb_path = os.path.join(cache_dir, content_hash[:2], f"{content_hash}.{extension}")
+    if os.path.exists(thumb_path):
+        return content_hash
+
+    buffer = np.frombuffer(content, dtype=np.uint8)
+    image = cv2.imdecode(buffer, REDUCED_READ_FLAGS[reduction])
+    if image is None:
+        return None
+    # Never let the reduced decode go below the requested size
+    if max(image.shape[:2]) < max_side and reduction > 1:
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+    scale = max_side / max(image.shape[:2])
+    if scale < 1:
+        size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+    # Write to a temporary name first so that readers never see a partial thumbnail
+    temp_path = f"{thumb_path}.{os.getpid()}.tmp.{extension}"
+    cv2.imwrite(temp_path, image, encode_params)
+    os.replace(temp_path, thumb_path)
+    return content_hash
+
+class ThumbnailCache:
+    """
+    Thumbnail cache keyed by image content hash.
+    """
+
+    def __init__(self, cache_dir, max_side=320, image_format='jpg', quality=85, size_budget_bytes=None, decode_reduction=2):
+        """
+        Initializes the cache and loads its index.
+
+        Args:
+            cache_dir (str): Directory of the cache.
+            max_side (int): Longest side of the thumbnails in pixels.
+            image_format (str): 'jpg' or 'webp'.
+            quality (int): Encoding quality (0-100).
+            size_budget_bytes (int, optional): Maximum total size of the thumbnails; evict() trims to it.
+            decode_reduction (int): JPEG decode downscale factor (1, 2, 4 or 8) used when building thumbnails.
+        """
+        if image_format not in ('jpg', 'webp'):
+            raise ValueError("image_format must be 'jpg' or 'webp'")
+        if decode_reduction not in REDUCED_READ_FLAGS:
+            raise ValueError(f"decode_reduction must be one of {sorted(REDUCED_READ_FLAGS)}")
+        self.cache_dir = cache_dir
+        self.max_side = max_side
+        self.extension = image_format
+        quality_flag = cv2.IMWRITE_JPEG_QUALITY if image_format == 'jpg' else cv2.IMWRITE_WEBP_QUALITY
+        self.encode_params = [quality_flag, quality]
+        self.size_budget_bytes = size_budget_bytes
+        self.decode_reduction = decode_reduction
+        os.makedirs(cache_dir, exist_ok=True)
+
+        index_path = os.path.join(cache_dir, INDEX_FILE)
+        if os.path.exists(index_path):
+            self.index = pd.read_parquet(index_path).set_index('path')
+        else:
+            self.index = pd.DataFrame(columns=INDEX_COLUMNS).set_index('path')
+
+    def thumbnail_path(self, content_hash):
+        """
+        Path of the thumbnail of a content hash.
+        """
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}.{self.extension}")
+
+    def _lookup(self, image_paths):
+        """
+        Return the cached content hash of every path whose size and mtime are unchanged (None otherwise).
+        """
+        stats = [os.stat(path) for path in image_paths]
+        cached = self.index.reindex(image_paths)
+        unchanged = ((cached['size'].to_numpy() == np.array([s.st_size for s in stats])) &
+                     (cached['mtime_ns'].to_numpy() == np.array([s.st_mtime_ns for s in stats])))
+        hashes = np.where(unchanged, cached['content_hash'].to_numpy(), None)
+        return hashes, stats
+
+    def build(self, image_paths, num_workers=8, chunksize=64):
+        """
+        Make sure every image has a thumbnail, building the missing ones in parallel.
+
+        Args:
+            image_paths (list): Paths of the source images.
+            num_workers (int): Number of worker processes.
+            chunksize (int): Number of images per task.
+
+        Returns:
+            list: Content hash of every image (None for images that could not be decoded).
+        """
+        image_paths = [os.path.abspath(path) for path in image_paths]
+        hashes, stats = self._lookup(image_paths)
+        missing = [i for i, content_hash in enumerate(hashes)
+                   if content_hash is None or not os.path.exists(self.thumbnail_path(content_hash))]
+        print(f"{len(image_paths)} images, {len(image_paths) - len(missing)} thumbnails cached, {len(missing)} to build")
+        # Record the access of the cached thumbnails for least-recently-used eviction
+        missing_set = set(missing)
+        for i, content_hash in enumerate(hashes):
+            if i not in missing_set:
+                os.utime(self.thumbnail_path(content_hash))
+
+        if missing:
+            jobs = [(image_paths[i], self.cache_dir, self.max_side, self.extension, self.encode_params, self.decode_reduction)
+                    for i in missing]
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                results = list(tqdm(executor.map(_make_thumbnail, jobs, chunksize=chunksize),
+                                    total=len(jobs), desc="Building thumbnails"))
+            for i, content_hash in zip(missing, results):
+                hashes[i] = content_hash
+
+            new_rows = pd.DataFrame({
+                'size': [stats[i].st_size for i in missing],
+                'mtime_ns': [stats[i].st_mtime_ns for i in missing],
+                'content_hash': [hashes[i] for i in missing],
+            }, index=pd.Index([image_paths[i] for i in missing], name='path'))
+            new_rows = new_rows[new_rows['content_hash'].notna()]
+            self.index = pd.concat([self.index[~self.index.index.isin(new_rows.index)], new_rows])
+            self.save_index()
+
+        if self.size_budget_bytes:
+            # Never evict the thumbnails this call returns
+            self.evict(protect={content_hash for content_hash in hashes if content_hash is not None})
+        return list(hashes)
+
+    def get(self, image_path):
+        """
+        Return the thumbnail path of an image, building it if needed.
+
+        Args:
+            image_path (str): Path of the source image.
+
+        Returns:
+            str or None: Path of the thumbnail, or None if the image could not be decoded.
+        """
+        image_path = os.path.abspath(image_path)
+        content_hash = self._lookup([image_path])[0][0]
+        if content_hash is None or not os.path.exists(self.thumbnail_path(content_hash)):
+            content_hash = self.build([image_path], num_workers=1)[0]
+        if content_hash is None:
+            return None
+        thumb_path = self.thumbnail_path(content_hash)
+        # Record the access for least-recently-used eviction
+        os.utime(thumb_path)
+        return thumb_path
+
+    def read(self, image_path):
+        """
+        Decode the thumbnail of an image.
+
+        Args:
+            image_path (str): Path of the source image.
+
+        Returns:
+            np.ndarray or None: BGR thumbnail.
+        """
+        thumb_path = self.get(image_path)
+        return cv2.imread(thumb_path) if thumb_path else None
+
+    def evict(self, protect=()):
+        """
+        Remove the least recently used thumbnails until the cache fits the size budget.
+
+        Args:
+            protect (collection): Content hashes whose thumbnails are never removed (e.g. the ones in use).
+
+        Returns:
+            int: Number of thumbnails removed.
+        """
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(f".{self.extension}"):
+                    stat = os.stat(os.path.join(root, name))
+                    total += stat.st_size
+                    if os.path.splitext(name)[0] in protect:
+                        continue
+                    entries.append((stat.st_mtime_ns, stat.st_size, os.path.join(root, name)))
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.size_budget_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+
+        if removed:
+            present = np.array([os.path.exists(self.thumbnail_path(h)) for h in self.index['content_hash']], dtype=bool)
+            self.index = self.index[present]
+            self.save_index()
+            print(f"Evicted {removed} thumbnails, cache size is now {total} bytes")
+        return removed
+
+    def save_index(self):
+        """
+        Save the path -> content hash index.
+        """
+        self.index.reset_index().to_parquet(os.path.join(self.cache_dir, INDEX_FILE), index=False)
+
+if __name__ == "__main__":
+    # Example usage
+    frame_folder = 'Datasets/47_logos_dataset/10_classes_final/images'
+    cache = ThumbnailCache('Datasets/thumbnail_cache', max_side=320, size_budget_bytes=5 * 1024 ** 3)
+    image_paths = [os.path.join(frame_folder, f) for f in os.listdir(frame_folder) if f.lower().endswith(('.jpg', '.png'))]
+    cache.build(image_paths)
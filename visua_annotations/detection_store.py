@@ -0,0 +1,333 @@
+"""
+This code streams Visua JSON exports into a columnar detection store, so that
+later steps can filter detections by medium or logoId without parsing JSON again.
+
+Each JSON file holds one array of detections. The array is decoded item by item
+(see iter_json_array), so memory does not grow with the size of the export. The
+store is a folder with:
+- detections.parquet: one row per detection with json_file, medium, brand_name,
+  logo_id, start, end, coord_start and coord_count
+- coordinates.bin: the per-frame 4-point coordinates of all detections, as one
+  flat float64 array of shape (total_frames, 8). Rows coord_start to
+  coord_start + coord_count belong to one detection.
+
+With a keyframe tolerance, a detection is stored as a track of keyframes
+instead: coordinates.bin only holds the keyframe coordinates, keyframes.bin
+their frame numbers within the track (int32) and the table a keyframe_count
+column. Keyframes are chosen so that linear interpolation between them stays
+within the tolerance (in pixels) of every original coordinate, and
+detection_coordinates interpolates only the frames that are asked for.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+TABLE_FILE = 'detections.parquet'
+COORDINATES_FILE = 'coordinates.bin'
+COORDINATE_DTYPE = np.float64
+KEYFRAMES_FILE = 'keyframes.bin'
+KEYFRAME_DTYPE = np.int32
+
+def iter_json_array(json_path, chunk_size=1024 * 1024):
+    """
+    Yields the items of a top-level JSON array one at a time, reading the file in chunks.
+
+    Args:
+        json_path (str): Path to a JSON file containing one array.
+        chunk_size (int): Number of characters read at a time.
+
+    Yields:
+        object: Decoded array items.
+    """
+    decoder = json.JSONDecoder()
+    with open(json_path, 'r', encoding='utf-8') as file:
+        buffer = ''
+        position = 0
+        eof = False
+        started = False
+        while True:
+            # Skip whitespace and separators between items
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position >= len(buffer):
+                if eof:
+                    raise ValueError(f"{json_path}: unexpected end of file inside the JSON array")
+                buffer = file.read(chunk_size)
+                position = 0
+                eof = not buffer
+                continue
+
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError(f"{json_path}: expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # A value not followed by a separator may continue in the next chunk (e.g. a number cut
+                # off as "12" or "1.5e")
+                complete = (end < len(buffer) and buffer[end] in ' \t\r\n,]') or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                # The item continues in the next chunk
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield item
+            position = end
+            # Drop the consumed part of the buffer now and then
+            if position > chunk_size:
+                buffer = buffer[position:]
+                position = 0
+
+def interpolate(start_coordinates, end_coordinates, t):
+    """
+    Linearly interpolates coordinates; t = 0 and t = 1 give the end points exactly.
+
+    Args:
+        start_coordinates (np.ndarray): (N, 8) coordinates at t = 0.
+        end_coordinates (np.ndarray): (N, 8) coordinates at t = 1.
+        t (np.ndarray): (N, 1) interpolation weights.
+
+    Returns:
+        np.ndarray: (N, 8) interpolated coordinates.
+    """
+    return (1 - t) * start_coordinates + t * end_coordinates
+
+def select_keyframes(coordinates, tolerance):
+    """
+    Selects the keyframes of a track (Douglas-Peucker): every coordinate of the track
+    is within tolerance of the linear interpolation between its surrounding keyframes.
+
+    Args:
+        coordinates (np.ndarray): (num_frames, 8) per-frame coordinates.
+        tolerance (float): Maximum interpolation error in pixels (0 only drops exactly interpolated frames).
+
+    Returns:
+        np.ndarray: Sorted frame numbers of the keyframes (first and last frame included).
+    """
+    num_frames = len(coordinates)
+    if num_frames == 0:
+        return np.empty(0, dtype=np.int64)
+    keep = np.zeros(num_frames, dtype=bool)
+    keep[[0, -1]] = True
+    segments = [(0, num_frames - 1)]
+    while segments:
+        first, last = segments.pop()
+        if last - first < 2:
+            continue
+        t = ((np.arange(first + 1, last) - first) / (last - first))[:, None]
+        errors = np.abs(coordinates[first + 1:last] - interpolate(coordinates[first], coordinates[last], t)).max(axis=1)
+        worst = int(errors.argmax())
+        if errors[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            segments += [(first, split), (split, last)]
+    return np.flatnonzero(keep)
+
+def interpolate_keyframes(keyframe_frames, keyframe_coordinates, frames):
+    """
+    Expands keyframes to the coordinates of the given frames.
+
+    Args:
+        keyframe_frames (np.ndarray): Sorted frame numbers of the keyframes.
+        keyframe_coordinates (np.ndarray): (num_keyframes, 8) keyframe coordinates.
+        frames (np.ndarray): Frame numbers to expand (within the track).
+
+    Returns:
+        np.ndarray: (len(frames), 8) coordinates.
+    """
+    frames = np.asarray(frames)
+    if len(keyframe_frames) == 1:
+        return np.repeat(np.asarray(keyframe_coordinates), len(frames), axis=0)
+    segment = np.clip(np.searchsorted(keyframe_frames, frames, side='right') - 1, 0, len(keyframe_frames) - 2)
+    first_frames = keyframe_frames[segment]
+    t = ((frames - first_frames) / (keyframe_frames[segment + 1] - first_frames))[:, None]
+    return interpolate(keyframe_coordinates[segment], keyframe_coordinates[segment + 1], t)
+
+def ingest_json_folder(json_folder, store_folder, keyframe_tolerance=None):
+    """
+    Streams every JSON file of a folder into a detection store.
+
+    Args:
+        json_folder (str): Folder containing the Visua JSON exports.
+        store_folder (str): Output folder of the store.
+        keyframe_tolerance (float, optional): Store keyframe tracks with this interpolation tolerance in
+            pixels instead of every frame's coordinates.
+
+    Returns:
+        DetectionStore: The ingested store.
+    """
+    os.makedirs(store_folder, exist_ok=True)
+    json_files = sorted(f for f in os.listdir(json_folder) if f.endswith('.json'))
+    columns = {name: [] for name in ['json_file', 'medium', 'brand_name', 'logo_id', 'start', 'end', 'coord_start', 'coord_count']}
+    if keyframe_tolerance is not None:
+        columns['keyframe_count'] = []
+    num_rows = 0
+    num_boxes = 0
+    skipped = 0
+
+    keyframes_path = os.path.join(store_folder, KEYFRAMES_FILE)
+    if keyframe_tolerance is None and os.path.exists(keyframes_path):
+        os.remove(keyframes_path)
+    coordinates_path = os.path.join(store_folder, COORDINATES_FILE)
+    with open(coordinates_path, 'wb') as coordinates_file, \
+            open(keyframes_path if keyframe_tolerance is not None else os.devnull, 'wb') as keyframes_file:
+        for json_file in tqdm(json_files, desc="Ingesting JSON files"):
+            for item in iter_json_array(os.path.join(json_folder, json_file)):
+                coordinates = np.asarray(item.get('coordinates') or [], dtype=COORDINATE_DTYPE)
+                if coordinates.size and (coordinates.ndim != 2 or coordinates.shape[1] != 8):
+                    skipped += 1
+                    continue
+                num_stored = len(coordinates)
+                if keyframe_tolerance is not None:
+                    keyframe_frames = select_keyframes(coordinates.reshape(-1, 8), keyframe_tolerance)
+                    keyframes_file.write(keyframe_frames.astype(KEYFRAME_DTYPE).tobytes())
+                    coordinates = coordinates.reshape(-1, 8)[keyframe_frames]
+                    columns['keyframe_count'].append(len(keyframe_frames))
+                coordinates_file.write(coordinates.tobytes())
+
+                columns['json_file'].append(json_file)
+                columns['medium'].append(item.get('medium') or '')
+                columns['brand_name'].append(item.get('brandName') or '')
+                columns['logo_id'].append(str(item.get('logoId')))
+                columns['start'].append(item.get('start'))
+                columns['end'].append(item.get('end'))
+                columns['coord_start'].append(num_rows)
+                columns['coord_count'].append(num_stored)
+                num_rows += len(coordinates)
+                num_boxes += num_stored
+
+    table = pd.DataFrame(columns)
+    table['json_file'] = table['json_file'].astype('category')
+    table['start'] = table['start'].astype(np.float64)
+    table['end'] = table['end'].astype(np.float64)
+    table['coord_start'] = table['coord_start'].astype(np.int64)
+    table['coord_count'] = table['coord_count'].astype(np.int32)
+    if keyframe_tolerance is not None:
+        table['keyframe_count'] = table['keyframe_count'].astype(np.int32)
+        table.attrs['keyframe_tolerance'] = keyframe_tolerance
+    table.to_parquet(os.path.join(store_folder, TABLE_FILE), index=False)
+
+    print(f"Ingested {len(table)} detections with {num_boxes} boxes from {len(json_files)} JSON files into {store_folder}")
+    if keyframe_tolerance is not None:
+        print(f"Stored {num_rows} keyframes ({num_rows / max(num_boxes, 1):.1%} of the boxes, tolerance {keyframe_tolerance} px)")
+    if skipped:
+        print(f"Warning: skipped {skipped} detections whose coordinates are not lists of 8 numbers")
+    return DetectionStore(store_folder)
+
+def load_or_ingest(json_folder, store_folder, keyframe_tolerance=None):
+    """
+    Opens a detection store, (re)ingesting the JSON folder if the store is missing, older than a
+    JSON file or stored with another keyframe tolerance.
+
+    Args:
+        json_folder (str): Folder containing the Visua JSON exports.
+        store_folder (str): Folder of the store.
+        keyframe_tolerance (float, optional): Keyframe interpolation tolerance in pixels (see ingest_json_folder).
+
+    Returns:
+        DetectionStore: The detection store.
+    """
+    table_path = os.path.join(store_folder, TABLE_FILE)
+    if os.path.exists(table_path):
+        store_time = os.path.getmtime(table_path)
+        json_times = [os.path.getmtime(os.path.join(json_folder, f)) for f in os.listdir(json_folder) if f.endswith('.json')]
+        if all(json_time < store_time for json_time in json_times):
+            store = DetectionStore(store_folder)
+            if store.keyframe_tolerance == keyframe_tolerance:
+                return store
+    return ingest_json_folder(json_folder, store_folder, keyframe_tolerance)
+
+class DetectionStore:
+    """
+    Read access to a detection store written by ingest_json_folder.
+    """
+
+    def __init__(self, store_folder):
+        """
+        Loads the detection table and memory-maps the coordinates.
+
+        Args:
+            store_folder (str): Folder of the store.
+        """
+        self.store_folder = store_folder
+        self.table = pd.read_parquet(os.path.join(store_folder, TABLE_FILE))
+        coordinates_path = os.path.join(store_folder, COORDINATES_FILE)
+        if os.path.getsize(coordinates_path):
+            self.coordinates = np.memmap(coordinates_path, dtype=COORDINATE_DTYPE, mode='r').reshape(-1, 8)
+        else:
+            self.coordinates = np.empty((0, 8), dtype=COORDINATE_DTYPE)
+
+        # Keyframe tracks (None for a store with every frame's coordinates)
+        self.keyframe_tolerance = self.table.attrs.get('keyframe_tolerance')
+        self.keyframes = None
+        if self.keyframe_tolerance is not None:
+            keyframes_path = os.path.join(store_folder, KEYFRAMES_FILE)
+            if os.path.getsize(keyframes_path):
+                self.keyframes = np.memmap(keyframes_path, dtype=KEYFRAME_DTYPE, mode='r')
+            else:
+                self.keyframes = np.empty(0, dtype=KEYFRAME_DTYPE)
+
+    def __len__(self):
+        return len(self.table)
+
+    def detection_coordinates(self, row, frames=None):
+        """
+        Returns the per-frame coordinates of one detection, interpolated from the keyframes in a keyframe store.
+
+        Args:
+            row (int): Row number of the detection in the table.
+            frames (np.ndarray, optional): Only return these frames (numbered from 0 within the track).
+
+        Returns:
+            np.ndarray: (coord_count or len(frames), 8) array of 4-point coordinates.
+        """
+        start = self.table['coord_start'].iat[row]
+        if self.keyframes is None:
+            coordinates = self.coordinates[start:start + self.table['coord_count'].iat[row]]
+            return coordinates if frames is None else coordinates[frames]
+
+        end = start + self.table['keyframe_count'].iat[row]
+        if frames is None:
+            frames = np.arange(self.table['coord_count'].iat[row])
+        if len(frames) == 0 or start == end:
+            return np.empty((0, 8), dtype=COORDINATE_DTYPE)
+        return interpolate_keyframes(self.keyframes[start:end], self.coordinates[start:end], frames)
+
+    def select(self, media=None, logo_ids=None):
+        """
+        Selects detections by medium and/or logo id.
+
+        Args:
+            media (list, optional): Media names to keep.
+            logo_ids (list, optional): Logo ids to keep (as strings).
+
+        Returns:
+            np.ndarray: Row numbers of the selected detections.
+        """
+        mask = np.ones(len(self.table), dtype=bool)
+        if media is not None:
+            mask &= self.table['medium'].isin(media).to_numpy()
+        if logo_ids is not None:
+            mask &= self.table['logo_id'].isin([str(logo_id) for logo_id in logo_ids]).to_numpy()
+        return np.flatnonzero(mask)
+
+if __name__ == "__main__":
+    # Example usage
+    json_folder = 'jsons'
+    store_folder = 'detection_store'
+    store = ingest_json_folder(json_folder, store_folder, keyframe_tolerance=0.5)
+    print(store.table.groupby('logo_id').size().sort_values(ascending=False).head(20))
@@ -0,0 +1,178 @@
+"""
+This code defines a DownloadLedger class that records every media download
+in a local SQLite database: url, kind, medium, logo, path, bytes, etag,
+sha256, status and timestamps. The DownloadManager uses it to decide which
+files to skip with one batched lookup instead of one os.path.isfile call per
+file, and it can be queried for downloads that failed or files that went missing.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite limits the number of parameters of one statement
+LOOKUP_BATCH_SIZE = 900
+
+class DownloadLedger:
+    """
+    SQLite ledger of media downloads, keyed by target path.
+    """
+
+    def __init__(self, db_path='download_ledger.sqlite'):
+        """
+        Opens (and creates if needed) the ledger database.
+
+        Args:
+            db_path (str): Path of the SQLite database file.
+        """
+        self.db_path = db_path
+        # One connection shared by the worker threads, serialized by the lock
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS downloads (
+                    path TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    kind TEXT,
+                    medium TEXT,
+                    logo TEXT,
+                    bytes INTEGER,
+                    etag TEXT,
+                    sha256 TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS downloads_status ON downloads (status)")
+
+    def register(self, jobs):
+        """
+        Adds download jobs to the ledger as pending; jobs already in the ledger are left unchanged.
+
+        Args:
+            jobs (list): Download jobs as dicts with 'url', 'path', 'kind' and optionally 'medium' and 'logo'.
+        """
+        now = time.time()
+        rows = [(job['path'], job['url'], job['kind'], job.get('medium'), job.get('logo'), now, now) for job in jobs]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO downloads (path, url, kind, medium, logo, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def statuses(self, paths):
+        """
+        Looks up the status of many target paths in batches.
+
+        Args:
+            paths (list): Target paths.
+
+        Returns:
+            dict: Path -> status ('pending', 'complete' or 'failed') for the paths in the ledger.
+        """
+        result = {}
+        with self.lock:
+            for i in range(0, len(paths), LOOKUP_BATCH_SIZE):
+                batch = paths[i:i + LOOKUP_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                for row in self.connection.execute(
+                        f"SELECT path, status FROM downloads WHERE path IN ({placeholders})", batch):
+                    result[row['path']] = row['status']
+        return result
+
+    def mark_complete(self, paths_info):
+        """
+        Marks downloads as complete.
+
+        Args:
+            paths_info (list): Dicts with 'path', 'bytes' and optionally 'etag' and 'sha256'.
+        """
+        now = time.time()
+        rows = [(info['bytes'], info.get('etag'), info.get('sha256'), now, info['path']) for info in paths_info]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "UPDATE downloads SET status = 'complete', bytes = ?, etag = ?, sha256 = ?, error = NULL, "
+                "attempts = attempts + 1, updated_at = ? WHERE path = ?", rows)
+
+    def mark_failed(self, path, error, attempts):
+        """
+        Marks a download as failed.
+
+        Args:
+            path (str): Target path.
+            error (str): Last error.
+            attempts (int): Number of attempts made in this run.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE downloads SET status = 'failed', error = ?, attempts = attempts + ?, updated_at = ? WHERE path = ?",
+                (error, attempts, time.time(), path))
+
+    def query(self, status=None, kind=None):
+        """
+        Lists ledger entries.
+
+        Args:
+            status (str, optional): Only entries with this status ('pending', 'complete' or 'failed').
+            kind (str, optional): Only entries of this kind ('icon', 'video' or 'image').
+
+        Returns:
+            list: Entries as dicts.
+        """
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if kind:
+            conditions.append("kind = ?")
+            params.append(kind)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(f"SELECT * FROM downloads{where} ORDER BY path", params)]
+
+    def missing(self):
+        """
+        Lists complete entries whose file is no longer on disk or has a different size.
+
+        Returns:
+            list: Entries as dicts.
+        """
+        missing = []
+        for entry in self.query(status='complete'):
+            if not os.path.isfile(entry['path']) or (entry['bytes'] is not None and os.path.getsize(entry['path']) != entry['bytes']):
+                missing.append(entry)
+        return missing
+
+    def summary(self):
+        """
+        Counts entries and bytes per kind and status.
+
+        Returns:
+            list: Dicts with 'kind', 'status', 'files' and 'bytes'.
+        """
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(
+                "SELECT kind, status, COUNT(*) AS files, COALESCE(SUM(bytes), 0) AS bytes "
+                "FROM downloads GROUP BY kind, status ORDER BY kind, status")]
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        self.connection.close()
+
+# Example usage
+if __name__ == "__main__":
+    ledger = DownloadLedger('download_ledger.sqlite')
+    for row in ledger.summary():
+        print(row)
+    for entry in ledger.query(status='failed'):
+        print(f"Failed: {entry['url']} -> {entry['path']} ({entry['error']}, {entry['attempts']} attempts)")
+    for entry in ledger.missing():
+        print(f"Missing: {entry['path']}")
+    ledger.close()
@@ -0,0 +1,145 @@
+"""
+This code defines the temporal frame sampling policy shared by annotation
+generation (step_3) and frame extraction (step_4).
+
+The policy selects frames per video. A frame is either selected as a whole or
+not at all: every box visible in a selected frame is labeled, so sampling never
+produces label files with missing boxes. Candidates are frame numbers that are
+multiples of the step (from the stride and the target fps), which keeps the
+selection aligned across overlapping tracks. They can further be limited per
+track (max_frames_per_track) and per logo and video (logo_quotas), keeping
+evenly spaced frames.
+
+step_3 only writes label files for the selected frames, and step_4 only
+retrieves and writes the frames that have a label file.
+"""
+
+import os
+import numpy as np
+
+class FrameSamplingPolicy:
+    """
+    Temporal frame sampling policy.
+    """
+
+    def __init__(self, stride=1, target_fps=None, max_frames_per_track=None, logo_quotas=None):
+        """
+        Initializes the policy. The default policy keeps every frame.
+
+        Args:
+            stride (int): Keep every stride-th frame.
+            target_fps (float, optional): Keep about target_fps frames per second (the larger of this step and stride is used).
+            max_frames_per_track (int, optional): Keep at most this many evenly spaced frames per detection track.
+            logo_quotas (dict, optional): "<brandName>_<logoId>" -> maximum number of frames selected for the logo per video.
+        """
+        if stride < 1:
+            raise ValueError("stride must be at least 1")
+        self.stride = stride
+        self.target_fps = target_fps
+        self.max_frames_per_track = max_frames_per_track
+        self.logo_quotas = logo_quotas or {}
+
+    def keeps_all_frames(self):
+        """
+        Returns True if the policy selects every frame.
+        """
+        return self.stride == 1 and not self.target_fps and not self.max_frames_per_track and not self.logo_quotas
+
+    def frame_step(self, fps):
+        """
+        Returns the step between candidate frames of a video.
+
+        Args:
+            fps (float): Frame rate of the video.
+        """
+        step = self.stride
+        if self.target_fps and fps > self.target_fps:
+            step = max(step, int(round(fps / self.target_fps)))
+        return step
+
+    def select_frames(self, tracks, fps):
+        """
+        Selects the frames of one video.
+
+        Args:
+            tracks (list): (start frame, number of frames, logo) of every detection track of the video.
+            fps (float): Frame rate of the video.
+
+        Returns:
+            np.ndarray: Sorted selected frame numbers.
+        """
+        step = self.frame_step(fps)
+        candidates = {}
+        for start_frame, num_frames, logo in tracks:
+            first = -(-start_frame // step) * step  # First multiple of step in the track
+            frames = np.arange(first, start_frame + num_frames, step, dtype=np.int64)
+            if self.max_frames_per_track is not None and len(frames) > self.max_frames_per_track:
+                frames = frames[evenly_spaced(len(frames), self.max_frames_per_track)]
+            candidates.setdefault(logo, []).append(frames)
+
+        selected = []
+        for logo, frame_lists in candidates.items():
+            frames = np.unique(np.concatenate(frame_lists))
+            quota = self.logo_quotas.get(logo)
+            if quota is not None and len(frames) > quota:
+                frames = frames[evenly_spaced(len(frames), quota)]
+            selected.append(frames)
+        if not selected:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(selected))
+
+def evenly_spaced(num_items, num_selected):
+    """
+    Returns the indices of num_selected evenly spaced items out of num_items (first and last included).
+    """
+    if num_selected <= 0:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.linspace(0, num_items - 1, num_selected).round().astype(np.int64))
+
+def labeled_frames(annotation_folder):
+    """
+    Lists the labeled frame numbers of every video of an annotation folder.
+
+    Args:
+        annotation_folder (str): Folder of the <video_name>_<frame>.txt label files.
+
+    Returns:
+        dict: Video name -> sorted array of frame numbers.
+    """
+    frames = {}
+    for annotation_filename in os.listdir(annotation_folder):
+        stem, extension = os.path.splitext(annotation_filename)
+        video_name, _, frame = stem.rpartition('_')
+        if extension == '.txt' and frame.isdigit():
+            frames.setdefault(video_name, []).append(int(frame))
+    return {video_name: np.array(sorted(numbers), dtype=np.int64) for video_name, numbers in frames.items()}
+
+def iter_selected_frames(video_capture, frame_numbers):
+    """
+    Yields the selected frames of a video. Frames in between are only grabbed, never
+    retrieved (no color conversion or copy), and reading stops after the last selected frame.
+
+    Args:
+        video_capture (cv2.VideoCapture): Opened video positioned at its first frame.
+        frame_numbers (np.ndarray): Sorted frame numbers to read.
+
+    Yields:
+        tuple: (frame number, frame).
+    """
+    position = 0
+    for frame_number in frame_numbers:
+        while position < frame_number:
+            if not video_capture.grab():
+                return
+            position += 1
+        ret, frame = video_capture.read()
+        if not ret:
+            return
+        position += 1
+        yield frame_number, frame
+
+if __name__ == "__main__":
+    # Example usage: two overlapping tracks of a 25 fps video sampled at about 5 fps
+    policy = FrameSamplingPolicy(target_fps=5, max_frames_per_track=4, logo_quotas={'Ford_14305': 2})
+    tracks = [(3, 40, 'Nike_210608'), (20, 100, 'Ford_14305')]
+    print(f"Step {policy.frame_step(25)}, selected frames: {policy.select_frames(tracks, 25).tolist()}")
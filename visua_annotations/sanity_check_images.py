@@ -1,12 +1,17 @@
 import cv2
 import os
+import sys
 import random
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thumbnail_cache import ThumbnailCache
+
 # Constants
 frame_folder = '14th_Mar_visua_downloaded_data/frames'
 annotation_folder = '14th_Mar_visua_downloaded_data/annotation'
 output_folder = '14th_Mar_visua_downloaded_data/annotated_images'
 num_images_to_process = 100  # Change this to the desired number of images to process
+thumbnail_cache_dir = '14th_Mar_visua_downloaded_data/thumbnail_cache'  # Set to None to draw on the full-resolution frames
 
 # Create the output folder if it doesn't exist
 os.makedirs(output_folder, exist_ok=True)
@@ -31,7 +36,7 @@ random.shuffle(images)
 count = 0
 font = cv2.FONT_HERSHEY_SIMPLEX
 bottom_left_corner = (10, 30)
-font_scale = 1
+font_scale = 0.5 if thumbnail_cache_dir else 1
 font_color = (0, 0, 255)  # Red
 line_type = 2
 
@@ -46,6 +51,13 @@ if classes_file:
 
 # print(labels)
 
+thumbnail_cache = None
+if thumbnail_cache_dir:
+    # Build the thumbnails of the sampled images in parallel; later passes read them from the cache
+    thumbnail_cache = ThumbnailCache(thumbnail_cache_dir, max_side=640)
+    sampled = [f for f in images if f.lower().endswith(('.png','.jpg'))][:num_images_to_process]
+    thumbnail_cache.build([os.path.join(frame_folder, f) for f in sampled])
+
 # Iterate through images and their annotations
 for image_filename in images:
     if count == num_images_to_process:
@@ -56,8 +68,8 @@ for image_filename in images:
     if image_filename.lower().endswith(('.png','.jpg')):
         image_path = os.path.join(frame_folder, image_filename)
 
-        # Load the image
-        image = cv2.imread(image_path)
+        # Load the image (boxes are normalized, so they can be drawn on the thumbnail directly)
+        image = thumbnail_cache.read(image_path) if thumbnail_cache else cv2.imread(image_path)
 
         # Get the corresponding annotation filename
         annotation_filename = os.path.splitext(image_filename)[0] + '.txt'
@@ -1,6 +1,7 @@
 import os
 import cv2
 import random
+from video_metadata import VideoMetadataCache
 
 # Constants
 video_folder = 'videos'
@@ -39,6 +40,9 @@ video_files = [video_file for video_file in os.listdir(video_folder) if video_fi
 # Shuffle the list of video files
 random.shuffle(video_files)
 
+# Frame sizes come from the shared metadata cache
+video_metadata = VideoMetadataCache().get_many([os.path.join(video_folder, video_file) for video_file in video_files[:max_videos_to_process]])
+
 # Initialize a counter for processed videos
 processed_videos = 0
 
@@ -54,8 +58,8 @@ for video_filename in video_files:
     cap = cv2.VideoCapture(video_path)
 
     # Initialize VideoWriter to save the annotated video
-    frame_width = int(cap.get(3))
-    frame_height = int(cap.get(4))
+    frame_width = int(video_metadata.loc[video_path, 'width'])
+    frame_height = int(video_metadata.loc[video_path, 'height'])
     out = cv2.VideoWriter(os.path.join(output_folder, video_filename),
                         cv2.VideoWriter_fourcc(*'mp4v'), 30,
                         (frame_width, frame_height))
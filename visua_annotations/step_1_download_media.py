@@ -3,107 +3,421 @@ This code defines a DownloadManager class that manages the download
 of icons and videos from JSON files. It creates directories to store
 the downloaded files, downloads the files concurrently using ThreadPoolExecutor,
 and ensures that each file is downloaded only once.
+
+All JSON files are first scanned into one deduplicated list of (url, target)
+jobs. The jobs then run on two global bounded pools, one for small files (icons
+and images) and one for videos, so that one large JSON file does not serialize
+the work. The aggregate throughput is reported at the end.
+
+Partial downloads are kept as .part files and resumed with HTTP Range requests.
+The ETag (or Last-Modified date) of the response is stored next to the .part file
+and sent as If-Range, so a remote file that changed in the meantime is downloaded
+again from the start instead of being appended to the old prefix. A file only
+gets its final name once its size matches the Content-Length and, for videos,
+once cv2.VideoCapture can decode its first frame. The reported throughput only
+counts the bytes received, not the resumed prefixes.
+
+Every download is recorded in a SQLite ledger (see download_ledger.py), which
+gives instant skip decisions on later runs and can be queried for failed or
+missing files.
+
+Files are streamed in chunks to a temporary file that is renamed into place
+once complete, so an interrupted download never leaves a truncated file under
+the final name. Each worker thread keeps its own pooled requests.Session, failed
+requests are retried with exponential backoff, and the downloads that still
+failed are written to a failure report.
 """
 
 import json
 import os
+import time
+import hashlib
+from collections import Counter
+import cv2
 import requests
+from requests.adapters import HTTPAdapter
 from concurrent.futures import ThreadPoolExecutor
 import threading
+from download_ledger import DownloadLedger
+from detection_store import iter_json_array
+
+# HTTP status codes worth retrying; other non-200 responses fail immediately
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+def expected_download_size(response, offset):
+    """
+    Returns the expected size of the complete file from a 200 or 206 response.
+
+    Args:
+        response (requests.Response): Response of the (possibly ranged) request.
+        offset (int): Number of bytes already downloaded.
+
+    Returns:
+        int or None: Expected total size in bytes, or None if the server did not tell.
+    """
+    if response.status_code == 206:
+        # Content-Range: bytes <start>-<end>/<total>
+        total = response.headers.get('Content-Range', '').rpartition('/')[2]
+        if total.isdigit():
+            return int(total)
+        length = response.headers.get('Content-Length')
+        return offset + int(length) if length and length.isdigit() else None
+
+    length = response.headers.get('Content-Length')
+    # Content-Length is the size of the encoded body, which differs from the file size if compressed
+    if length and length.isdigit() and not response.headers.get('Content-Encoding'):
+        return int(length)
+    return None
+
+def resume_validator(response):
+    """
+    Returns the validator to send as If-Range when resuming a download of this response.
+
+    Args:
+        response (requests.Response): Response that started the download.
+
+    Returns:
+        str or None: Strong ETag or Last-Modified date (weak ETags cannot be used with If-Range).
+    """
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+def read_validator(validator_path):
+    """
+    Reads the validator stored next to a .part file (None if there is none).
+    """
+    if not os.path.exists(validator_path):
+        return None
+    with open(validator_path, 'r', encoding='utf-8') as file:
+        return file.read().strip() or None
+
+def write_validator(validator_path, validator):
+    """
+    Stores the validator of a .part file, or removes the stored one if validator is None.
+    """
+    if validator is None:
+        remove_if_exists(validator_path)
+        return
+    with open(validator_path, 'w', encoding='utf-8') as file:
+        file.write(validator)
+
+def remove_if_exists(path):
+    """
+    Removes a file if it exists.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+
+def probe_video(video_path):
+    """
+    Cheaply checks that a video can be opened and its first frame decoded.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        bool: True if the video looks valid.
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened() or cap.get(cv2.CAP_PROP_FRAME_COUNT) <= 0:
+            return False
+        ret, _ = cap.read()
+        return ret
+    finally:
+        cap.release()
 
 class DownloadManager:
     """
     Manages downloading of icons and videos from JSON data files.
     """
 
-    def __init__(self):
+    def __init__(self, timeout=(10, 60), max_retries=3, backoff_factor=1.0, chunk_size=1024 * 1024,
+                 failure_report='download_failures.json', small_file_workers=16, video_workers=4,
+                 ledger_path='download_ledger.sqlite'):
         """
         Initializes DownloadManager with directory paths and locks.
+
+        Args:
+            timeout (tuple): (connect, read) timeouts in seconds for each request.
+            max_retries (int): Number of retries after a failed attempt.
+            backoff_factor (float): Wait backoff_factor * 2 ** attempt seconds before retrying.
+            chunk_size (int): Number of bytes written per chunk.
+            failure_report (str): Path of the JSON report of failed downloads.
+            small_file_workers (int): Maximum number of concurrent icon and image downloads.
+            video_workers (int): Maximum number of concurrent video downloads.
+            ledger_path (str): Path of the SQLite download ledger. Set to None to decide by os.path.isfile only.
         """
         self.json_folder = 'json_files'  # Define the folder name here
         self.icon_directory = 'icons'
         self.video_directory = 'videos'
         self.image_directory = 'images'
-        self.icons = set()
-        self.media = set()
-        self.icons_lock = threading.Lock()  # Lock for icons set
-        self.media_lock = threading.Lock()  # Lock for videos set
+        self.small_file_workers = small_file_workers
+        self.video_workers = video_workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.chunk_size = chunk_size
+        self.failure_report = failure_report
+        self.failures = []
+        self.failures_lock = threading.Lock()  # Lock for failures list
+        self.thread_local = threading.local()  # Holds one requests.Session and a byte counter per worker thread
+        self.ledger = DownloadLedger(ledger_path) if ledger_path else None
         os.makedirs(self.icon_directory, exist_ok=True)
         os.makedirs(self.video_directory, exist_ok=True)
         os.makedirs(self.image_directory, exist_ok=True)
 
+    def get_session(self):
+        """
+        Returns the requests.Session of the calling worker thread, creating it on first use.
+        Reusing the session keeps connections to the media host alive between downloads.
+        """
+        session = getattr(self.thread_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self.thread_local.session = session
+        return session
+
     def download_and_save_file(self, url, save_path):
         """
         Downloads file from the given URL and saves it to the specified path.
 
+        The response is streamed to save_path + '.part', which is renamed to save_path
+        only after the download was verified. If a .part file is left over from an
+        interrupted attempt or run, the download resumes from its end with a Range
+        request guarded by If-Range with the validator stored in save_path + '.part.validator'.
+        A .part file without a validator is downloaded again from the start. Connection
+        errors, timeouts, incomplete bodies and retryable status codes are retried with
+        exponential backoff. The number of bytes received is added to the calling
+        thread's bytes_transferred counter.
+
         Args:
             url (str): The URL of the file to download.
             save_path (str): The path to save the downloaded file.
+
+        Returns:
+            bool: True if the file was downloaded, False if all attempts failed.
         """
         print(f"Downloading {url}")
-        response = requests.get(url)
-        if response.status_code == 200:
-            with open(save_path, 'wb') as file:
-                file.write(response.content)
+        part_path = f"{save_path}.part"
+        validator_path = f"{part_path}.validator"
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff_factor * 2 ** (attempt - 1))
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            validator = read_validator(validator_path) if offset else None
+            if offset and validator is None:
+                # Without a validator the remote file may have changed since the .part file was written
+                os.remove(part_path)
+                offset = 0
+            headers = {'Range': f"bytes={offset}-", 'If-Range': validator} if offset else {}
+            try:
+                with self.get_session().get(url, stream=True, timeout=self.timeout, headers=headers) as response:
+                    if response.status_code == 416:
+                        # The .part file does not match the remote file anymore; start over
+                        os.remove(part_path)
+                        remove_if_exists(validator_path)
+                        error = "HTTP 416"
+                        continue
+                    if response.status_code not in (200, 206):
+                        error = f"HTTP {response.status_code}"
+                        if response.status_code in RETRY_STATUS_CODES:
+                            continue
+                        break
+                    expected_size = expected_download_size(response, offset)
+                    etag = response.headers.get('ETag')
+                    # A 200 answer to a Range request means the server sent the whole file again
+                    # (e.g. because it changed and If-Range did not match)
+                    mode = 'ab' if response.status_code == 206 else 'wb'
+                    if mode == 'wb':
+                        write_validator(validator_path, resume_validator(response))
+                    digest = hashlib.sha256()
+                    if mode == 'ab':
+                        with open(part_path, 'rb') as file:
+                            for block in iter(lambda: file.read(self.chunk_size), b''):
+                                digest.update(block)
+                    with open(part_path, mode) as file:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            file.write(chunk)
+                            digest.update(chunk)
+                            self.thread_local.bytes_transferred = getattr(self.thread_local, 'bytes_transferred', 0) + len(chunk)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+
+            size = os.path.getsize(part_path)
+            if expected_size is not None and size != expected_size:
+                # Keep the .part file so that the next attempt resumes it
+                error = f"Incomplete download: {size} of {expected_size} bytes"
+                continue
+            if save_path.endswith('.mp4') and not probe_video(part_path):
+                os.remove(part_path)
+                remove_if_exists(validator_path)
+                error = "Downloaded video cannot be decoded"
+                continue
+            os.replace(part_path, save_path)
+            remove_if_exists(validator_path)
+            if self.ledger:
+                self.ledger.mark_complete([{'path': save_path, 'bytes': size, 'etag': etag, 'sha256': digest.hexdigest()}])
+            return True
+
+        print(f"Failed to download {url}: {error}")
+        with self.failures_lock:
+            self.failures.append({'url': url, 'path': save_path, 'error': error, 'attempts': attempt + 1})
+        if self.ledger:
+            self.ledger.mark_failed(save_path, error, attempt + 1)
+        return False
+
+    def save_failure_report(self):
+        """
+        Saves the failed downloads to the failure report (JSON list of url, path, error and attempts).
+        """
+        with open(self.failure_report, 'w', encoding='utf-8') as file:
+            json.dump(self.failures, file, indent=2)
+        print(f"{len(self.failures)} downloads failed. Report saved to {self.failure_report}")
 
     def process_json_file(self, json_file):
         """
-        Processes each JSON file, extracts icon and video URLs, and downloads them.
+        Scans one JSON file for icon and video URLs.
 
         Args:
             json_file (str): The name of the JSON file to process.
-        """
-        with open(os.path.join(self.json_folder, json_file), 'r', encoding='utf-8') as file:
-            data = json.load(file)
-
-        print(json_file, len(data))
-        for idx, item in enumerate(data):
 
+        Returns:
+            list: Download jobs as dicts with 'url', 'path', 'kind' ('icon', 'video' or 'image'), 'medium' and 'logo'.
+        """
+        jobs = []
+        num_items = 0
+        # Stream the items instead of loading the whole export into memory
+        for item in iter_json_array(os.path.join(self.json_folder, json_file)):
+            num_items += 1
             icon_url = item.get("iconUrl")
             download_url = item.get("downloadUrl")
             medium = item.get('medium')
             logo = item.get('brandName')
-            flag = False
-            print(idx, medium, logo)
-
-            if download_url.endswith('.mp4'):
-                flag = True
-
-            # Download and save icons
-            if icon_url and logo not in self.icons:
-                with self.icons_lock:
-                    self.icons.add(logo)
-                icon_filename = os.path.join(self.icon_directory, f"{logo}.png")
-                if not os.path.isfile(icon_filename):
-                    self.download_and_save_file(icon_url, icon_filename)
-
-            # Download and save videos
-            if download_url and medium not in self.media:
-                with self.media_lock:
-                    self.media.add(medium)
-                if flag:
-                    media_filename = os.path.join(self.video_directory, f"{medium}.mp4")
+
+            if icon_url:
+                jobs.append({'url': icon_url, 'path': os.path.join(self.icon_directory, f"{logo}.png"),
+                             'kind': 'icon', 'medium': None, 'logo': logo})
+
+            if download_url:
+                if download_url.endswith('.mp4'):
+                    jobs.append({'url': download_url, 'path': os.path.join(self.video_directory, f"{medium}.mp4"),
+                                 'kind': 'video', 'medium': medium, 'logo': logo})
                 else:
-                    media_filename = os.path.join(self.image_directory, f"{medium}.jpg")
-                if not os.path.isfile(media_filename):
-                    self.download_and_save_file(download_url, media_filename)
+                    jobs.append({'url': download_url, 'path': os.path.join(self.image_directory, f"{medium}.jpg"),
+                                 'kind': 'image', 'medium': medium, 'logo': logo})
 
-        print(f"{json_file} Icons and videos downloaded and saved.")
+        print(json_file, num_items)
+        return jobs
 
-    def start_download(self):
+    def plan_downloads(self, verify_existing_videos=False):
         """
-        Initiates the download process for JSON files in parallel.
+        Scans all JSON files into one list of download jobs, keeping one job per target
+        file (the first URL seen) and skipping files that were already downloaded.
+
+        Files recorded as complete in the ledger are skipped without touching the disk.
+        Only the other files are checked with os.path.isfile; files found on disk that
+        way (downloaded before the ledger existed) are recorded as complete.
+
+        Args:
+            verify_existing_videos (bool): Probe existing videos with cv2.VideoCapture. Videos
+                that cannot be decoded (e.g. truncated by an older run) are downloaded again, resumed
+                from the broken file if the ledger recorded their ETag.
+
+        Returns:
+            list: Download jobs as dicts with 'url', 'path' and 'kind'.
         """
-        json_files = os.listdir(self.json_folder)  # Use the folder variable here
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            executor.map(self.process_json_file, json_files)
+        json_files = sorted(os.listdir(self.json_folder))
+        planned = {}
+        for json_file in json_files:
+            for job in self.process_json_file(json_file):
+                planned.setdefault(job['path'], job)
+
+        paths = list(planned)
+        statuses = {}
+        if self.ledger:
+            self.ledger.register(planned.values())
+            statuses = self.ledger.statuses(paths)
+        done = {path for path, status in statuses.items() if status == 'complete'}
+
+        on_disk = [path for path in paths if path not in done and os.path.isfile(path)]
+        if self.ledger and on_disk:
+            self.ledger.mark_complete([{'path': path, 'bytes': os.path.getsize(path)} for path in on_disk])
+        done.update(on_disk)
+
+        if verify_existing_videos:
+            # The recorded ETags let broken videos resume with If-Range
+            etags = {entry['path']: entry['etag'] for entry in self.ledger.query(kind='video')} if self.ledger else {}
+            for path in paths:
+                if path in done and planned[path]['kind'] == 'video' and not (os.path.isfile(path) and probe_video(path)):
+                    print(f"{path} is missing or cannot be decoded, downloading it again")
+                    etag = etags.get(path)
+                    if os.path.isfile(path) and etag and not etag.startswith('W/'):
+                        os.replace(path, f"{path}.part")
+                        write_validator(f"{path}.part.validator", etag)
+                    done.discard(path)
+
+        jobs = [planned[path] for path in paths if path not in done]
+        counts = Counter(job['kind'] for job in jobs)
+        print(f"{len(json_files)} JSON files, {len(planned)} unique files, {len(planned) - len(jobs)} already downloaded, "
+              f"{len(jobs)} to download ({dict(counts)})")
+        return jobs
+
+    def run_job(self, job):
+        """
+        Downloads one job.
+
+        Args:
+            job (dict): Download job from plan_downloads.
+
+        Returns:
+            int: Number of bytes received over the network (excluding the resumed prefix of a .part file).
+        """
+        self.thread_local.bytes_transferred = 0
+        self.download_and_save_file(job['url'], job['path'])
+        return self.thread_local.bytes_transferred
+
+    def start_download(self, verify_existing_videos=False):
+        """
+        Plans the downloads and runs them on separate bounded pools for small files and videos.
+
+        Args:
+            verify_existing_videos (bool): Probe already downloaded videos and resume broken ones.
+        """
+        self.failures = []
+        jobs = self.plan_downloads(verify_existing_videos)
+        video_jobs = [job for job in jobs if job['kind'] == 'video']
+        small_jobs = [job for job in jobs if job['kind'] != 'video']
+
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.video_workers) as video_executor, \
+                ThreadPoolExecutor(max_workers=self.small_file_workers) as small_executor:
+            # Submit videos first so that the long downloads start as early as possible
+            video_results = video_executor.map(self.run_job, video_jobs)
+            small_results = small_executor.map(self.run_job, small_jobs)
+            video_bytes = sum(video_results)
+            small_bytes = sum(small_results)
+        elapsed = max(time.time() - start_time, 1e-9)
 
+        total_mb = (video_bytes + small_bytes) / 1024 ** 2
+        print(f"Downloaded {total_mb:.1f} MB in {elapsed:.1f}s ({total_mb / elapsed:.2f} MB/s): "
+              f"videos {video_bytes / 1024 ** 2:.1f} MB, icons and images {small_bytes / 1024 ** 2:.1f} MB")
         print("All icons and videos downloaded and saved.")
+        self.save_failure_report()
 
 # Start downloading process
 if __name__ == "__main__":
     manager = DownloadManager()
     manager.start_download()
+    for row in manager.ledger.summary():
+        print(row)
 
 
 
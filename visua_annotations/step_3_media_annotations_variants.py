@@ -0,0 +1,48 @@
+# ============== several label variants from one pass over the videos ==============
+
+import json
+from detection_store import load_or_ingest
+from annotation_engine import generate_annotation_variants
+from frame_sampling import FrameSamplingPolicy
+from step_3_media_annotations_with_classes_with_mapping import logos_mapping
+
+# Define the folder paths
+video_folder = '/home/areebadnan/Areeb_code/work/Visua_Data/videos/videos_test'
+json_folder = '/home/areebadnan/Areeb_code/work/Atheritia/Scripts/Data-Preprocessing-for-Logo-Detection/visua_annotations/jsons'
+store_folder = '/home/areebadnan/Areeb_code/work/Atheritia/Scripts/Data-Preprocessing-for-Logo-Detection/visua_annotations/detection_store'
+keyframe_tolerance = None  # Store every frame's coordinates; e.g. 0.5 to store keyframe tracks interpolated within 0.5 px
+
+# One entry per label tree: its output folder, an optional logo id filter and an
+# optional predefined mapping (class numbers are assigned in order of first appearance without one)
+variants = [
+    {
+        'annotation_folder': '/home/areebadnan/Areeb_code/work/Atheritia/Scripts/Data-Preprocessing-for-Logo-Detection/visua_annotations/annotation_all_logos',
+    },
+    {
+        'annotation_folder': '/home/areebadnan/Areeb_code/work/Atheritia/Scripts/Data-Preprocessing-for-Logo-Detection/visua_annotations/annotation_with_mapping',
+        'logos_mapping': logos_mapping,
+    },
+    {
+        'annotation_folder': '/home/areebadnan/Areeb_code/work/Atheritia/Scripts/Data-Preprocessing-for-Logo-Detection/visua_annotations/annotation_folder',
+        'logo_ids': ['210608', '32409'],
+    },
+]
+
+num_workers = 8  # Number of processes annotating videos in parallel (1 processes them one by one)
+timing_file = 'annotation_timings.csv'  # Per-video annotation timings
+sampling_policy = FrameSamplingPolicy()  # Label every frame; e.g. FrameSamplingPolicy(target_fps=5, max_frames_per_track=50) to sample
+
+if __name__ == "__main__":
+    # Load the detections of all JSON files (ingested once into a columnar store)
+    store = load_or_ingest(json_folder, store_folder, keyframe_tolerance)
+
+    # Write every variant's label tree from the same pass over the videos and detections
+    mappings = generate_annotation_variants(video_folder, store, variants, num_workers=num_workers, timing_file=timing_file,
+                                            sampling_policy=sampling_policy)
+
+    # Save the logo to class mapping of every variant next to its labels
+    for variant, mapping in zip(variants, mappings):
+        mapping_file = variant['annotation_folder'].rstrip('/') + '_logo_to_class_mapping.json'
+        with open(mapping_file, 'w') as file:
+            json.dump(mapping, file, indent=4)
+        print(f"Logo to class mapping saved to {mapping_file}.")
@@ -1,10 +1,8 @@
 # ============== without using threads to process videos and images =================
 
-import os
-import json
-import cv2
-import pandas as pd
-from tqdm import tqdm
+from detection_store import load_or_ingest
+from annotation_engine import generate_annotations
+from frame_sampling import FrameSamplingPolicy
 
 
 # Define the folder paths
@@ -16,45 +14,16 @@ annotation_folder = '/home/areebadnan/Areeb_code/work/Atheritia/Scripts/Data-Pre
 
 
 json_folder = '/home/areebadnan/Areeb_code/work/Atheritia/Scripts/Data-Preprocessing-for-Logo-Detection/visua_annotations/jsons'
+store_folder = '/home/areebadnan/Areeb_code/work/Atheritia/Scripts/Data-Preprocessing-for-Logo-Detection/visua_annotations/detection_store'
+keyframe_tolerance = None  # Store every frame's coordinates; e.g. 0.5 to store keyframe tracks interpolated within 0.5 px
 
 # Dictionary to store the logo to class mapping
 
-skip_intervals = [2, 3, 4, 5, 6] # Skip every 2nd, 3rd, 4th, 5th, and 6th frame
+sampling_policy = FrameSamplingPolicy()  # Label every frame; e.g. FrameSamplingPolicy(target_fps=5, max_frames_per_track=50) to sample
 logo_ids = ['210608','32409']
 
-# skip_intervals = [i for i in range(1, 6)]
-
-# Function to convert time to frame number
-def time_to_frame(time, fps):
-    return int(time * fps)
-
-def convert_to_yolo(annotation, image_width, image_height, class_id=0):
-    # Extract 4-point annotation coordinates
-    x1, y1, x2, y2, x3, y3, x4, y4 = annotation
-
-    # Calculate the minimum and maximum x and y coordinates
-    min_x = min(x1, x2, x3, x4)
-    max_x = max(x1, x2, x3, x4)
-    min_y = min(y1, y2, y3, y4)
-    max_y = max(y1, y2, y3, y4)
-
-    # Calculate the center coordinates of the bounding box
-    center_x = (min_x + max_x) / 2
-    center_y = (min_y + max_y) / 2
-
-    # Calculate the width and height of the bounding box
-    width = max_x - min_x
-    height = max_y - min_y
-
-    # Normalize coordinates and dimensions to be between 0 and 1
-    center_x = max(0, min(center_x / image_width, 1))
-    center_y = max(0, min(center_y / image_height, 1))
-    width = max(0, min(width / image_width, 1))
-    height = max(0, min(height / image_height, 1))
-
-    # Format the result as YOLO-style annotation
-    yolo_annotation = f"{class_id} {center_x:.6f} {center_y:.6f} {width:.6f} {height:.6f}\n"
-    return yolo_annotation
+num_workers = 8  # Number of processes annotating videos in parallel (1 processes them one by one)
+timing_file = 'annotation_timings.csv'  # Per-video annotation timings
 
 # Predefined logo-to-class mapping
 logos_mapping = {
@@ -90,71 +59,6 @@ logos_mapping = {
     "Bitpanda_178037": 29
 }
 
-def process_video(video_file, json_data):
-    # print(f"Processing video {video_file}\n")
-    video_path = os.path.join(video_folder, video_file)
-    video_capture = cv2.VideoCapture(video_path)
-
-    if not video_capture.isOpened():
-        print(f"Error: Could not open video file: {video_path}")
-        return
-
-    fps = video_capture.get(cv2.CAP_PROP_FPS)
-    total_frames = int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT)) # Get the total number of frames
-    width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    video_name = video_file.split('.')[0]
-
-    print('Total Frames:', total_frames)
-    cout_bbox = 0
-
-    for json_file in json_data:
-        data = json_data[json_file]
-        for idx, item in enumerate(data):
-            medium = item.get('medium')
-            start_time = item.get("start")
-            end_time = item.get("end")
-            logo_part1 = item.get('brandName')
-            logo_part2 = str(item.get('logoId'))
-            logo = logo_part1 + "_" + logo_part2
-
-            if logo_part2 in logo_ids:
-            
-                if video_name == medium:
-                    start_frame = time_to_frame(start_time, fps)
-                    end_frame = time_to_frame(end_time, fps)
-                    coordinates = item.get("coordinates")
-                    cout_bbox += len(coordinates)
-
-                    # Use the predefined class number from logos_mapping
-                    class_id = logos_mapping.get(logo, -1)  # Use -1 or another default if not found
-
-                    if class_id == -1:
-                        print(f"Warning: Logo '{logo}' not found in logos_mapping dictionary.")
-                        continue
-
-                    for frame_number in range(start_frame, end_frame):
-
-
-                        #             # Check if the current frame number should be skipped
-                        # skip = any(frame_number % interval == 0 for interval in skip_intervals)
-
-                        # if skip:
-                        #     continue  # Skip this frame
-
-                        # # Skip every 5th frame (you can customize the condition as needed)
-                        # if frame_number % 2 == 0:
-                        #     continue  # Skip this frame
-
-                        annotation_filename = f"{video_name}_{frame_number}.txt"
-                        annotation_filepath = os.path.join(annotation_folder, annotation_filename)
-                        yolo_coordinates = convert_to_yolo(coordinates[frame_number - start_frame], width, height, class_id)
-                        with open(annotation_filepath, 'a') as annotation_file:
-                            annotation_file.write(yolo_coordinates)
-
-    print("Video processing finished")
-    print('Total Bounding Boxes:', cout_bbox)
-
 # def process_image(image_file, json_data):
 #     print(f"Processing image {image_file}\n")
 #     image_path = os.path.join(image_folder, image_file)
@@ -186,26 +90,13 @@ def process_video(video_file, json_data):
 
 #     print("Image processing finished")
 
-# Create the annotation folder if it doesn't exist
-os.makedirs(annotation_folder, exist_ok=True)
-
-# Get a list of video and image files
-video_files = [video_file for video_file in os.listdir(video_folder) if video_file.endswith('.mp4')]
-# image_files = [image_file for image_file in os.listdir(image_folder) if image_file.endswith(('.jpg', '.png'))]
-
-# Load JSON data for all videos into a dictionary
-json_data = {}
-for json_file in os.listdir(json_folder):
-    with open(os.path.join(json_folder, json_file), 'r') as file:
-        data = json.load(file)
-        json_data[json_file] = data
-
-# Process video files with tqdm progress bar
-print("Processing video files...")
-for video_file in tqdm(video_files, desc="Videos", unit="video"):
-    process_video(video_file, json_data)
+if __name__ == "__main__":
+    # Load the detections of all JSON files (ingested once into a columnar store)
+    store = load_or_ingest(json_folder, store_folder, keyframe_tolerance)
 
-print("Video annotations generated successfully.")
+    # Generate the annotations; only the detections of each video's own medium are visited
+    generate_annotations(video_folder, store, annotation_folder, logo_ids=logo_ids, logos_mapping=logos_mapping,
+                         num_workers=num_workers, timing_file=timing_file, sampling_policy=sampling_policy)
 
 # Process image files with tqdm progress bar
 # print("Processing image files...")
@@ -4,6 +4,7 @@
 import os
 import cv2
 from tqdm import tqdm
+from frame_sampling import labeled_frames, iter_selected_frames
 
 # Folder containing your videos
 video_folder = 'videos'
@@ -16,47 +17,31 @@ os.makedirs(frame_folder, exist_ok=True)
 # Function to process a single video file
 def process_video(video_file):
     if video_file.endswith('.mp4'):
+        # Get the base name of the video (without extension)
+        video_name = os.path.splitext(video_file)[0]
+
+        # Frames selected by the sampling policy of step_3 (the frames with a label file)
+        frame_numbers = frames_to_extract.get(video_name)
+        if frame_numbers is None:
+            return
+
         # Construct the full path to the video file
         video_path = os.path.join(video_folder, video_file)
 
         # Open the video file for reading
         cap = cv2.VideoCapture(video_path)
 
-        # Get the base name of the video (without extension)
-        video_name = os.path.splitext(video_file)[0]
-
-        # Get the total number of frames in the video
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-        # Initialize frame counter starting from 0
-        frame_count = 0
-
         # Create a progress bar with tqdm
-        with tqdm(total=total_frames, desc=f"Processing {video_file}", unit="frame") as pbar:
-            while True:
-                # Read a frame from the video
-                ret, frame = cap.read()
-
-                # Break the loop if we have reached the end of the video
-                if not ret:
-                    break
-
-                # Construct the corresponding annotation (.txt) filename
-                annotation_filename = f"{video_name}_{frame_count}.txt"
-                annotation_filepath = os.path.join(annotation_folder, annotation_filename)
-
-                # Check if the annotation file exists (only process the frame if it has a corresponding .txt)
-                if os.path.isfile(annotation_filepath):
-                    # Construct the output image file name
-                    image_name = f"{video_name}_{frame_count}.jpg"
-                    image_path = os.path.join(frame_folder, image_name)
-
-                    # Save the frame as an image
-                    cv2.imwrite(image_path, frame)
-                    # print(f"Saved frame {image_name}")
-
-                # Increment the frame counter and update the progress bar
-                frame_count += 1
+        with tqdm(total=len(frame_numbers), desc=f"Processing {video_file}", unit="frame") as pbar:
+            # Frames without a label file are only grabbed, and reading stops after the last labeled frame
+            for frame_count, frame in iter_selected_frames(cap, frame_numbers):
+                # Construct the output image file name
+                image_name = f"{video_name}_{frame_count}.jpg"
+                image_path = os.path.join(frame_folder, image_name)
+
+                # Save the frame as an image
+                cv2.imwrite(image_path, frame)
+                # print(f"Saved frame {image_name}")
                 pbar.update(1)
 
         # Release the video capture object
@@ -65,6 +50,9 @@ def process_video(video_file):
 # List of video files in the folder
 video_files = [video_file for video_file in os.listdir(video_folder) if video_file.endswith('.mp4')]
 
+# List the labeled frames of every video once instead of checking a label file per decoded frame
+frames_to_extract = labeled_frames(annotation_folder)
+
 # Process each video file
 for video_file in video_files:
     process_video(video_file)
@@ -0,0 +1,85 @@
+"""
+Tests of the annotation engine on a small synthetic fixture of JSON exports and videos.
+"""
+
+import json
+import os
+import cv2
+import numpy as np
+import pytest
+from detection_store import ingest_json_folder
+from annotation_engine import generate_annotations
+from frame_sampling import FrameSamplingPolicy
+
+FPS = 10
+WIDTH, HEIGHT = 64, 48
+
+def write_video(path, num_frames):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), FPS, (WIDTH, HEIGHT))
+    for frame in range(num_frames):
+        writer.write(np.full((HEIGHT, WIDTH, 3), frame * 5 % 256, dtype=np.uint8))
+    writer.release()
+
+@pytest.fixture
+def fixture_folder(tmp_path):
+    rng = np.random.default_rng(0)
+    video_folder = tmp_path / 'videos'
+    json_folder = tmp_path / 'jsons'
+    video_folder.mkdir()
+    json_folder.mkdir()
+
+    logos = [('Nike', 210608), ('Ford', 14305), ('Adidas', 32409)]
+    for json_index in range(2):
+        detections = []
+        for video_index in range(json_index * 3, json_index * 3 + 3):
+            medium = f"video{video_index}"
+            write_video(str(video_folder / f"{medium}.mp4"), 30)
+            for _ in range(2 + video_index):
+                brand_name, logo_id = logos[rng.integers(len(logos))]
+                start_frame = int(rng.integers(0, 20))
+                num_frames = int(rng.integers(1, 12))
+                detections.append({
+                    'medium': medium, 'brandName': brand_name, 'logoId': logo_id,
+                    'start': start_frame / FPS, 'end': (start_frame + num_frames) / FPS,
+                    'coordinates': rng.uniform(-5, 70, size=(num_frames, 8)).round(2).tolist(),
+                })
+        (json_folder / f"export{json_index}.json").write_text(json.dumps(detections))
+
+    store = ingest_json_folder(str(json_folder), str(tmp_path / 'store'))
+    return tmp_path, store
+
+def read_folder(folder):
+    return {name: open(os.path.join(folder, name), 'rb').read() for name in os.listdir(folder)}
+
+def test_parallel_output_matches_serial(fixture_folder):
+    tmp_path, store = fixture_folder
+    video_folder = str(tmp_path / 'videos')
+
+    serial_mapping = generate_annotations(video_folder, store, str(tmp_path / 'serial'), num_workers=1,
+                                          metadata_cache_path=None)
+    parallel_mapping = generate_annotations(video_folder, store, str(tmp_path / 'parallel'), num_workers=3,
+                                            metadata_cache_path=None)
+
+    serial = read_folder(tmp_path / 'serial')
+    assert serial
+    assert read_folder(tmp_path / 'parallel') == serial
+    assert parallel_mapping == serial_mapping
+
+def test_sampled_frames_keep_all_boxes(fixture_folder):
+    tmp_path, store = fixture_folder
+    video_folder = str(tmp_path / 'videos')
+    policy = FrameSamplingPolicy(stride=2, max_frames_per_track=3)
+
+    generate_annotations(video_folder, store, str(tmp_path / 'all'), metadata_cache_path=None)
+    generate_annotations(video_folder, store, str(tmp_path / 'sampled'), metadata_cache_path=None, sampling_policy=policy)
+
+    all_frames = read_folder(tmp_path / 'all')
+    sampled = read_folder(tmp_path / 'sampled')
+    assert 0 < len(sampled) < len(all_frames)
+    assert all(int(name.rsplit('_', 1)[1][:-4]) % 2 == 0 for name in sampled)
+    # A selected frame has the same boxes as without sampling
+    assert all(content == all_frames[name] for name, content in sampled.items())
+
+    # Annotating again without sampling restores the removed label files
+    generate_annotations(video_folder, store, str(tmp_path / 'sampled'), metadata_cache_path=None)
+    assert read_folder(tmp_path / 'sampled') == all_frames
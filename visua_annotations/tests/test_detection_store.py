@@ -0,0 +1,72 @@
+"""
+Tests of the streaming JSON reader and of the detection store.
+"""
+
+import json
+import numpy as np
+import pytest
+from detection_store import iter_json_array, ingest_json_folder, load_or_ingest
+
+ITEMS = [{'medium': 'video0', 'start': 1.5e-7, 'coordinates': [[1, 2.25, -3, 4e10, 5, 6, 7, 8]]},
+         1234, -5678.125, 'text, with ] inside', True, None, [], {}]
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 8, 13, 1024])
+def test_iter_json_array_across_chunk_boundaries(tmp_path, chunk_size):
+    json_path = tmp_path / 'export.json'
+    json_path.write_text(json.dumps(ITEMS, indent=1))
+    assert list(iter_json_array(str(json_path), chunk_size=chunk_size)) == ITEMS
+
+def test_iter_json_array_numbers_cut_at_chunk_boundary(tmp_path):
+    json_path = tmp_path / 'export.json'
+    json_path.write_text('[1234, 5678, 1.5e3]')
+    assert list(iter_json_array(str(json_path), chunk_size=3)) == [1234, 5678, 1500.0]
+
+def test_iter_json_array_truncated_file(tmp_path):
+    json_path = tmp_path / 'export.json'
+    json_path.write_text('[1, 2')
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(json_path), chunk_size=2))
+
+def write_smooth_export(json_folder, num_frames=300):
+    frames = np.arange(num_frames)[:, None]
+    coordinates = 500 + 200 * np.sin(frames / 50 + np.arange(8)) + np.random.default_rng(0).normal(0, 0.1, (num_frames, 8))
+    detections = [
+        {'medium': 'video0', 'brandName': 'Nike', 'logoId': 1, 'start': 0, 'end': num_frames / 25,
+         'coordinates': coordinates.tolist()},
+        {'medium': 'video0', 'brandName': 'Ford', 'logoId': 2, 'start': 1, 'end': 1.04,
+         'coordinates': [[10, 10, 20, 10, 20, 20, 10, 20]]},
+        {'medium': 'video1', 'brandName': 'Ford', 'logoId': 2, 'start': 0, 'end': 0, 'coordinates': []},
+    ]
+    json_folder.mkdir()
+    (json_folder / 'export.json').write_text(json.dumps(detections))
+
+def test_keyframe_store_stays_within_tolerance(tmp_path):
+    write_smooth_export(tmp_path / 'jsons')
+    dense = ingest_json_folder(str(tmp_path / 'jsons'), str(tmp_path / 'dense'))
+    keyframes = ingest_json_folder(str(tmp_path / 'jsons'), str(tmp_path / 'keyframes'), keyframe_tolerance=0.5)
+
+    assert keyframes.keyframe_tolerance == 0.5
+    assert len(keyframes.coordinates) < len(dense.coordinates) / 2
+    for row in range(len(dense)):
+        expanded = keyframes.detection_coordinates(row)
+        assert expanded.shape == dense.detection_coordinates(row).shape
+        assert np.abs(expanded - dense.detection_coordinates(row)).max(initial=0) <= 0.5
+
+    # Expanding only some frames gives the same values as expanding the whole track
+    frames = np.array([0, 7, 150, 299])
+    assert np.array_equal(keyframes.detection_coordinates(0, frames), keyframes.detection_coordinates(0)[frames])
+
+def test_zero_tolerance_is_lossless(tmp_path):
+    write_smooth_export(tmp_path / 'jsons')
+    dense = ingest_json_folder(str(tmp_path / 'jsons'), str(tmp_path / 'dense'))
+    keyframes = ingest_json_folder(str(tmp_path / 'jsons'), str(tmp_path / 'keyframes'), keyframe_tolerance=0)
+    for row in range(len(dense)):
+        assert np.array_equal(keyframes.detection_coordinates(row), dense.detection_coordinates(row))
+
+def test_load_or_ingest_reingests_on_tolerance_change(tmp_path):
+    write_smooth_export(tmp_path / 'jsons')
+    store_folder = str(tmp_path / 'store')
+    assert load_or_ingest(str(tmp_path / 'jsons'), store_folder).keyframe_tolerance is None
+    assert load_or_ingest(str(tmp_path / 'jsons'), store_folder, keyframe_tolerance=0.5).keyframe_tolerance == 0.5
+    store = load_or_ingest(str(tmp_path / 'jsons'), store_folder)
+    assert store.keyframe_tolerance is None and store.keyframes is None
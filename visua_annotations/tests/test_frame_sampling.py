@@ -0,0 +1,50 @@
+"""
+Tests of the frame sampling policy and of the frame extraction helpers.
+"""
+
+import cv2
+import numpy as np
+from frame_sampling import FrameSamplingPolicy, labeled_frames, iter_selected_frames
+
+def test_default_policy_keeps_every_frame():
+    policy = FrameSamplingPolicy()
+    assert policy.keeps_all_frames()
+    assert policy.select_frames([(3, 5, 'Nike_1'), (6, 4, 'Ford_2')], 25).tolist() == list(range(3, 10))
+
+def test_selection_is_aligned_across_tracks():
+    policy = FrameSamplingPolicy(target_fps=5)
+    assert policy.frame_step(25) == 5
+    # Both tracks are visible at frames 20 to 40, which get selected for both of them
+    assert policy.select_frames([(3, 40, 'Nike_1'), (20, 100, 'Ford_2')], 25).tolist() == list(range(5, 120, 5))
+
+def test_track_limit_and_logo_quota():
+    policy = FrameSamplingPolicy(target_fps=5, max_frames_per_track=4, logo_quotas={'Ford_2': 2})
+    assert policy.select_frames([(3, 40, 'Nike_1'), (20, 100, 'Ford_2')], 25).tolist() == [5, 15, 20, 30, 40, 115]
+
+def test_labeled_frames(tmp_path):
+    for name in ['video_a_3.txt', 'video_a_10.txt', 'video_b_0.txt', 'video_b_x.txt', 'notes.md']:
+        (tmp_path / name).write_text('')
+    frames = labeled_frames(str(tmp_path))
+    assert {video: numbers.tolist() for video, numbers in frames.items()} == {'video_a': [3, 10], 'video_b': [0]}
+
+def test_iter_selected_frames_matches_sequential_decode(tmp_path):
+    video_path = str(tmp_path / 'video.avi')
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (32, 24))
+    for frame in range(20):
+        writer.write(np.full((24, 32, 3), frame * 10, dtype=np.uint8))
+    writer.release()
+
+    capture = cv2.VideoCapture(video_path)
+    all_frames = []
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        all_frames.append(frame)
+    capture.release()
+
+    capture = cv2.VideoCapture(video_path)
+    selected = list(iter_selected_frames(capture, np.array([0, 4, 5, 17, 25])))
+    capture.release()
+    assert [frame_number for frame_number, _ in selected] == [0, 4, 5, 17]
+    assert all(np.array_equal(frame, all_frames[frame_number]) for frame_number, frame in selected)
@@ -0,0 +1,162 @@
+"""
+Tests of the DownloadManager against a local HTTP server stand-in that supports
+Range and If-Range requests and can cut a response off mid-body.
+"""
+
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from step_1_download_media import DownloadManager
+
+class MediaServer:
+    """
+    In-process HTTP server serving byte strings, recording every request.
+    """
+
+    def __init__(self):
+        self.files = {}  # URL path -> (content, ETag)
+        self.cut_off = {}  # URL path -> number of bytes sent before the connection is dropped (once)
+        self.requests = []  # (URL path, Range header, If-Range header)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, self.headers.get('Range'), self.headers.get('If-Range')))
+                if self.path not in server.files:
+                    self.send_error(404)
+                    return
+                content, etag = server.files[self.path]
+                start = 0
+                match = re.match(r'bytes=(\d+)-$', self.headers.get('Range') or '')
+                if_range = self.headers.get('If-Range')
+                if match and (if_range is None or if_range == etag):
+                    start = int(match.group(1))
+                    if start >= len(content):
+                        self.send_response(416)
+                        self.send_header('Content-Range', f"bytes */{len(content)}")
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f"bytes {start}-{len(content) - 1}/{len(content)}")
+                else:
+                    self.send_response(200)
+                body = content[start:]
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                cut_off = server.cut_off.pop(self.path, None)
+                if cut_off is not None:
+                    self.wfile.write(body[:cut_off])
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def server():
+    media_server = MediaServer()
+    yield media_server
+    media_server.close()
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    download_manager = DownloadManager(max_retries=2, backoff_factor=0, chunk_size=1024,
+                                       ledger_path=str(tmp_path / 'ledger.sqlite'))
+    yield download_manager
+    download_manager.ledger.close()
+
+CONTENT = bytes(range(256)) * 64  # 16 KiB
+
+def test_cut_off_stream_is_resumed(server, manager, tmp_path):
+    server.files['/a.png'] = (CONTENT, '"v1"')
+    server.cut_off['/a.png'] = 5 * 1024
+    save_path = str(tmp_path / 'a.png')
+
+    assert manager.run_job({'url': server.url + '/a.png', 'path': save_path}) == len(CONTENT)
+    assert open(save_path, 'rb').read() == CONTENT
+    assert server.requests == [('/a.png', None, None), ('/a.png', f"bytes={5 * 1024}-", '"v1"')]
+    assert not (tmp_path / 'a.png.part').exists()
+    assert not (tmp_path / 'a.png.part.validator').exists()
+
+def test_leftover_part_file_is_resumed(server, manager, tmp_path):
+    server.files['/a.png'] = (CONTENT, '"v1"')
+    (tmp_path / 'a.png.part').write_bytes(CONTENT[:6000])
+    (tmp_path / 'a.png.part.validator').write_text('"v1"')
+    save_path = str(tmp_path / 'a.png')
+
+    # Only the missing bytes count as transferred
+    assert manager.run_job({'url': server.url + '/a.png', 'path': save_path}) == len(CONTENT) - 6000
+    assert open(save_path, 'rb').read() == CONTENT
+    assert server.requests == [('/a.png', 'bytes=6000-', '"v1"')]
+
+def test_changed_remote_file_is_downloaded_again(server, manager, tmp_path):
+    new_content = CONTENT[::-1]
+    server.files['/a.png'] = (new_content, '"v2"')
+    (tmp_path / 'a.png.part').write_bytes(CONTENT[:6000])
+    (tmp_path / 'a.png.part.validator').write_text('"v1"')
+    save_path = str(tmp_path / 'a.png')
+
+    assert manager.download_and_save_file(server.url + '/a.png', save_path)
+    assert open(save_path, 'rb').read() == new_content
+
+def test_part_file_without_validator_is_restarted(server, manager, tmp_path):
+    server.files['/a.png'] = (CONTENT, '"v1"')
+    (tmp_path / 'a.png.part').write_bytes(b'x' * 6000)
+    save_path = str(tmp_path / 'a.png')
+
+    assert manager.download_and_save_file(server.url + '/a.png', save_path)
+    assert open(save_path, 'rb').read() == CONTENT
+    assert server.requests == [('/a.png', None, None)]
+
+def test_range_not_satisfiable_restarts(server, manager, tmp_path):
+    server.files['/a.png'] = (CONTENT, '"v1"')
+    (tmp_path / 'a.png.part').write_bytes(CONTENT + b'extra')
+    (tmp_path / 'a.png.part.validator').write_text('"v1"')
+    save_path = str(tmp_path / 'a.png')
+
+    assert manager.download_and_save_file(server.url + '/a.png', save_path)
+    assert open(save_path, 'rb').read() == CONTENT
+    assert server.requests == [('/a.png', f"bytes={len(CONTENT) + 5}-", '"v1"'), ('/a.png', None, None)]
+
+def test_not_found_is_reported_without_retries(server, manager, tmp_path):
+    save_path = str(tmp_path / 'missing.png')
+    manager.ledger.register([{'url': server.url + '/missing.png', 'path': save_path, 'kind': 'icon'}])
+
+    assert not manager.download_and_save_file(server.url + '/missing.png', save_path)
+    assert len(server.requests) == 1
+    assert manager.failures == [{'url': server.url + '/missing.png', 'path': save_path, 'error': 'HTTP 404', 'attempts': 1}]
+    assert manager.ledger.query(status='failed')[0]['path'] == save_path
+    assert not (tmp_path / 'missing.png').exists()
+
+def test_rerun_skips_files_in_ledger(server, manager, tmp_path):
+    server.files['/nike.png'] = (CONTENT, '"v1"')
+    server.files['/media1.jpg'] = (CONTENT[::-1], '"v1"')
+    items = [{'iconUrl': server.url + '/nike.png', 'brandName': 'Nike', 'medium': 'media1',
+              'downloadUrl': server.url + '/media1.jpg'}]
+    (tmp_path / 'json_files').mkdir()
+    (tmp_path / 'json_files' / 'export.json').write_text(json.dumps(items))
+
+    manager.start_download()
+    assert (tmp_path / 'icons' / 'Nike.png').read_bytes() == CONTENT
+    assert (tmp_path / 'images' / 'media1.jpg').read_bytes() == CONTENT[::-1]
+    num_requests = len(server.requests)
+
+    assert manager.plan_downloads() == []
+    manager.start_download()
+    assert len(server.requests) == num_requests
+    assert {row['status'] for row in manager.ledger.query()} == {'complete'}
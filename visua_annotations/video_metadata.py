@@ -0,0 +1,121 @@
+"""
+This code caches video metadata (fps, width, height and frame count) so that
+the annotation, frame extraction and sanity check steps do not open every video
+with cv2.VideoCapture just to read its properties.
+
+The cache is a parquet file keyed by absolute path. An entry is reused only if
+the file size and modification time still match; missing or stale entries are
+probed in parallel and written back.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import pandas as pd
+from tqdm import tqdm
+
+METADATA_CACHE_FILE = 'video_metadata.parquet'
+METADATA_COLUMNS = ['path', 'size', 'mtime_ns', 'fps', 'width', 'height', 'frame_count', 'ok']
+
+def probe_video_metadata(video_path):
+    """
+    Reads the metadata of one video.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        dict: 'fps', 'width', 'height', 'frame_count' and 'ok' (False if the video cannot be opened).
+    """
+    video_capture = cv2.VideoCapture(video_path)
+    try:
+        if not video_capture.isOpened():
+            return {'fps': 0.0, 'width': 0, 'height': 0, 'frame_count': 0, 'ok': False}
+        return {
+            'fps': video_capture.get(cv2.CAP_PROP_FPS),
+            'width': int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'frame_count': int(video_capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+            'ok': True,
+        }
+    finally:
+        video_capture.release()
+
+class VideoMetadataCache:
+    """
+    Video metadata cache keyed by path, size and modification time.
+    """
+
+    def __init__(self, cache_path=METADATA_CACHE_FILE, num_workers=8):
+        """
+        Loads the cache.
+
+        Args:
+            cache_path (str, optional): Path of the parquet cache file. If None, the cache is kept in memory only.
+            num_workers (int): Number of threads probing videos.
+        """
+        self.cache_path = cache_path
+        self.num_workers = num_workers
+        if cache_path and os.path.exists(cache_path):
+            self.entries = pd.read_parquet(cache_path).set_index('path')
+        else:
+            self.entries = pd.DataFrame(columns=METADATA_COLUMNS).set_index('path')
+
+    def get_many(self, video_paths):
+        """
+        Returns the metadata of many videos, probing the missing or stale ones in parallel.
+
+        Args:
+            video_paths (list): Paths to the video files.
+
+        Returns:
+            pd.DataFrame: 'fps', 'width', 'height', 'frame_count' and 'ok', indexed by the given paths.
+        """
+        absolute_paths = [os.path.abspath(path) for path in video_paths]
+        stats = [os.stat(path) for path in absolute_paths]
+        cached = self.entries.reindex(absolute_paths)
+        fresh = ((cached['size'].to_numpy() == [stat.st_size for stat in stats]) &
+                 (cached['mtime_ns'].to_numpy() == [stat.st_mtime_ns for stat in stats]))
+        stale = [i for i in range(len(absolute_paths)) if not fresh[i]]
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                probed = list(tqdm(executor.map(probe_video_metadata, [absolute_paths[i] for i in stale]),
+                                   total=len(stale), desc="Probing videos"))
+            new_entries = pd.DataFrame(probed, index=pd.Index([absolute_paths[i] for i in stale], name='path'))
+            new_entries['size'] = [stats[i].st_size for i in stale]
+            new_entries['mtime_ns'] = [stats[i].st_mtime_ns for i in stale]
+            self.entries = pd.concat([self.entries[~self.entries.index.isin(new_entries.index)], new_entries[self.entries.columns]])
+            self.save()
+
+        result = self.entries.reindex(absolute_paths)[['fps', 'width', 'height', 'frame_count', 'ok']]
+        result.index = pd.Index(video_paths, name='path')
+        return result.astype({'fps': float, 'width': int, 'height': int, 'frame_count': int, 'ok': bool})
+
+    def get(self, video_path):
+        """
+        Returns the metadata of one video.
+
+        Args:
+            video_path (str): Path to the video file.
+
+        Returns:
+            dict: 'fps', 'width', 'height', 'frame_count' and 'ok'.
+        """
+        return self.get_many([video_path]).iloc[0].to_dict()
+
+    def save(self):
+        """
+        Writes the cache file (no-op for an in-memory cache).
+        """
+        if self.cache_path:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            self.entries.reset_index().to_parquet(self.cache_path, index=False)
+
+if __name__ == "__main__":
+    # Example usage
+    video_folder = 'videos'
+    cache = VideoMetadataCache(METADATA_CACHE_FILE)
+    video_paths = [os.path.join(video_folder, f) for f in os.listdir(video_folder) if f.endswith('.mp4')]
+    metadata = cache.get_many(video_paths)
+    print(metadata.describe())
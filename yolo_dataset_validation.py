@@ -1,5 +1,6 @@
 import os
 from tqdm import tqdm
+from pipeline_report import PipelineReport, folder_size
 
 def check_duplicate_bboxes(labels_folder):
     """
@@ -154,7 +155,7 @@ def check_incorrect_class_labels(labels_folder, valid_classes):
                         break
     return incorrect_class_labels
 
-def prompt_deletion(file_list, file_type, delete_func=None, folder_path=None, labels_folder=None):
+def prompt_deletion(file_list, file_type, delete_func=None, folder_path=None, labels_folder=None, interactive=True):
     """
     Prompt the user to delete files and perform the deletion if confirmed.
 
@@ -164,12 +165,17 @@ def prompt_deletion(file_list, file_type, delete_func=None, folder_path=None, la
         delete_func (function, optional): Function to handle specific deletion logic if needed.
         folder_path (str, optional): Path to the folder containing the files to delete. Needed for images.
         labels_folder (str, optional): Path to the labels folder.
+        interactive (bool): If False, only report the files and never prompt or delete.
     """
     if not file_list:
         print(f"No {file_type} found.")
         return
 
     print(f"{len(file_list)} {file_type} found.")
+    if not interactive:
+        print(f"{file_type.capitalize()} not deleted (non-interactive run).")
+        return
+
     user_input = input(f"Do you want to delete these {file_type}? (yes/no): ").strip().lower()
     if user_input == 'yes':
         if delete_func:
@@ -184,7 +190,7 @@ def prompt_deletion(file_list, file_type, delete_func=None, folder_path=None, la
     else:
         print(f"{file_type.capitalize()} not deleted.")
 
-def run_all_checks(images_folder, labels_folder, valid_classes):
+def run_all_checks(images_folder, labels_folder, valid_classes, report=None, step_prefix='validation', interactive=True):
     """
     Run all data validation checks and handle deletions.
 
@@ -192,32 +198,66 @@ def run_all_checks(images_folder, labels_folder, valid_classes):
         images_folder (str): Path to the folder containing image files.
         labels_folder (str): Path to the folder containing label files.
         valid_classes (set): Set of valid class indices.
+        report (PipelineReport, optional): Report to add the per-check records to.
+            A new one is created if not given.
+        step_prefix (str): Prefix for the step names in the report (e.g. 'train').
+        interactive (bool): If False, offending files are reported but never deleted.
+
+    Returns:
+        PipelineReport: Report with per-rule counts, wall time, files/s and bytes read.
     """
+    if report is None:
+        report = PipelineReport('run_all_checks')
+
+    num_images, _ = folder_size(images_folder)
+    num_labels, label_bytes = folder_size(labels_folder)
+
+    def run_check(rule, check_func, *args, files, bytes_read):
+        with report.step(f"{step_prefix}/{rule}", files=files, bytes_read=bytes_read) as record:
+            result = check_func(*args)
+            record['offending'] = len(result)
+        report.add_offending(step_prefix, rule, result)
+        return result
+
     # Check for duplicate bounding boxes
-    duplicate_bboxes = check_duplicate_bboxes(labels_folder)
-    prompt_deletion(duplicate_bboxes, "duplicate bounding boxes", delete_func=delete_duplicate_bboxes, labels_folder=labels_folder)
+    duplicate_bboxes = run_check('duplicate_bboxes', check_duplicate_bboxes, labels_folder,
+                                 files=num_labels, bytes_read=label_bytes)
+    prompt_deletion(duplicate_bboxes, "duplicate bounding boxes", delete_func=delete_duplicate_bboxes, labels_folder=labels_folder, interactive=interactive)
 
     # Check for images without corresponding labels
-    images_with_no_labels = check_images_with_no_labels(images_folder, labels_folder)
-    prompt_deletion(images_with_no_labels, "images without labels", folder_path=images_folder)
+    images_with_no_labels = run_check('images_without_labels', check_images_with_no_labels, images_folder, labels_folder,
+                                      files=num_images, bytes_read=0)
+    prompt_deletion(images_with_no_labels, "images without labels", folder_path=images_folder, interactive=interactive)
 
     # Check for labels without corresponding images
-    labels_with_no_images = check_labels_with_no_images(images_folder, labels_folder)
-    prompt_deletion(labels_with_no_images, "labels without images", labels_folder=labels_folder)
+    labels_with_no_images = run_check('labels_without_images', check_labels_with_no_images, images_folder, labels_folder,
+                                      files=num_labels, bytes_read=0)
+    prompt_deletion(labels_with_no_images, "labels without images", labels_folder=labels_folder, interactive=interactive)
+
+    # Re-measure the labels folder since the prompts above may have deleted files
+    num_labels, label_bytes = folder_size(labels_folder)
 
     # Check for non-YOLO format label files
-    non_yolo_format_labels = check_non_yolo_format_labels(labels_folder)
-    prompt_deletion(non_yolo_format_labels, "non-YOLO format labels", labels_folder=labels_folder)
+    non_yolo_format_labels = run_check('non_yolo_format', check_non_yolo_format_labels, labels_folder,
+                                       files=num_labels, bytes_read=label_bytes)
+    prompt_deletion(non_yolo_format_labels, "non-YOLO format labels", labels_folder=labels_folder, interactive=interactive)
+
+    num_labels, label_bytes = folder_size(labels_folder)
 
     # Check for label files without detections
-    labels_without_detection = check_labels_without_detections(labels_folder)
-    prompt_deletion(labels_without_detection, "labels without detections", labels_folder=labels_folder)
+    labels_without_detection = run_check('labels_without_detections', check_labels_without_detections, labels_folder,
+                                         files=num_labels, bytes_read=label_bytes)
+    prompt_deletion(labels_without_detection, "labels without detections", labels_folder=labels_folder, interactive=interactive)
+
+    num_labels, label_bytes = folder_size(labels_folder)
 
     # Check for label files with incorrect class indices
-    incorrect_class_labels = check_incorrect_class_labels(labels_folder, valid_classes)
-    prompt_deletion(incorrect_class_labels, "incorrect class labels", labels_folder=labels_folder)
+    incorrect_class_labels = run_check('incorrect_class_labels', check_incorrect_class_labels, labels_folder, valid_classes,
+                                       files=num_labels, bytes_read=label_bytes)
+    prompt_deletion(incorrect_class_labels, "incorrect class labels", labels_folder=labels_folder, interactive=interactive)
 
     print("The validation on YOLO labels is done.")
+    return report
 
 # The module can now be imported and used in other scripts without running the main function
 if __name__ == "__main__":
@@ -225,4 +265,5 @@ if __name__ == "__main__":
     valid_classes = set(range(0, 47))
     images_folder = "Visua_Data/augmentation_test/images"
     labels_folder = "Visua_Data/augmentation_test/labels"
-    run_all_checks(images_folder, labels_folder, valid_classes)
+    report = run_all_checks(images_folder, labels_folder, valid_classes)
+    report.save("Visua_Data/augmentation_test/validation_report.json")